@@ -411,10 +411,10 @@ class NattkaCommands(object):
             b = BugInfo(bug_cat, f'{packages[0]} {initial_arches}\n')
             plist = dict(match_package_list(repo, b, only_new=True))
             assert len(plist) == 1
-            cc_arches = sorted(
-                [f'{x}@gentoo.org' for x
-                 in set(itertools.chain.from_iterable(plist.values()))
-                 if '-' not in x])
+            cc_arches = tuple(sorted(
+                f'{x}@gentoo.org' for x
+                in set(itertools.chain.from_iterable(plist.values()))
+                if '-' not in x))
 
             it = 1
             # prepare the initial set
@@ -5,8 +5,11 @@
 
 import datetime
 import enum
+import functools
 import typing
 
+from types import TracebackType
+
 import requests
 
 from nattka.keyword import keyword_sort_key
@@ -49,12 +52,7 @@ class BugCategory(enum.Enum):
         Return a BugCategory for bug in @product and @component.
         """
 
-        if product == 'Gentoo Linux':
-            if component == 'Keywording':
-                return cls.KEYWORDREQ
-            elif component == 'Stabilization':
-                return cls.STABLEREQ
-        return None
+        return BUG_CATEGORY_BY_COMPONENT.get((product, component))
 
     @classmethod
     def to_products_components(cls,
@@ -66,12 +64,37 @@ class BugCategory(enum.Enum):
         category.
         """
 
-        if val == cls.KEYWORDREQ:
-            return (['Gentoo Linux'], ['Keywording'])
-        elif val == cls.STABLEREQ:
-            return (['Gentoo Linux'], ['Stabilization'])
-        else:
-            assert False, f'Incorrect BugCategory: {val}'
+        assert val in BUG_CATEGORY_COMPONENTS, f'Incorrect BugCategory: {val}'
+        product, component = BUG_CATEGORY_COMPONENTS[val]
+        return ([product], [component])
+
+
+BUG_CATEGORY_COMPONENTS = {
+    BugCategory.KEYWORDREQ: ('Gentoo Linux', 'Keywording'),
+    BugCategory.STABLEREQ: ('Gentoo Linux', 'Stabilization'),
+}
+
+BUG_CATEGORY_BY_COMPONENT = {
+    v: k for k, v in BUG_CATEGORY_COMPONENTS.items()}
+
+
+@functools.cache
+def category_search_params(categories: typing.FrozenSet[BugCategory]
+                           ) -> typing.Tuple[typing.Tuple[str, ...],
+                                             typing.Tuple[str, ...]]:
+    """
+    Return a tuple of products and components to search for @categories.
+
+    The result is cached, as the same category sets are used repeatedly.
+    """
+
+    products: typing.Set[str] = set()
+    components: typing.Set[str] = set()
+    for cat in categories:
+        prod, comp = BugCategory.to_products_components(cat)
+        products.update(prod)
+        components.update(comp)
+    return (tuple(sorted(products)), tuple(sorted(components)))
 
 
 class BugRuntimeTestingState(enum.Enum):
@@ -83,16 +106,16 @@ class BugRuntimeTestingState(enum.Enum):
 class BugInfo(typing.NamedTuple):
     category: typing.Optional[BugCategory]
     atoms: str
-    cc: typing.List[str] = []
-    depends: typing.List[int] = []
-    blocks: typing.List[int] = []
+    cc: typing.Tuple[str, ...] = ()
+    depends: typing.Tuple[int, ...] = ()
+    blocks: typing.Tuple[int, ...] = ()
     sanity_check: typing.Optional[bool] = None
     security: bool = False
     resolved: bool = False
-    keywords: typing.List[str] = []
+    keywords: typing.Tuple[str, ...] = ()
     whiteboard: str = ''
     assigned_to: str = ''
-    last_change_time: datetime.datetime = datetime.datetime.utcnow()
+    last_change_time: datetime.datetime = datetime.datetime.min
     runtime_testing_required: typing.Optional[BugRuntimeTestingState] = None
 
 
@@ -118,13 +141,13 @@ def make_bug_info(bug: typing.Dict[str, typing.Any]
 
     return BugInfo(category=bcat,
                    atoms=atoms,
-                   cc=bug['cc'],
-                   depends=bug['depends_on'],
-                   blocks=bug['blocks'],
+                   cc=tuple(bug['cc']),
+                   depends=tuple(bug['depends_on']),
+                   blocks=tuple(bug['blocks']),
                    sanity_check=sanity_check,
                    security=(bug['product'] == 'Gentoo Security'),
                    resolved=bool(bug['resolution']),
-                   keywords=bug['keywords'],
+                   keywords=tuple(bug['keywords']),
                    whiteboard=bug['whiteboard'],
                    assigned_to=bug['assigned_to'],
                    last_change_time=datetime.datetime.fromisoformat(
@@ -139,7 +162,23 @@ class NattkaBugzilla(object):
         self.api_key = api_key
         self.api_url = api_url or BUGZILLA_API_URL
         self.session = requests.Session()
-        self.username = None
+        self.username: typing.Optional[str] = None
+
+    def __enter__(self) -> 'NattkaBugzilla':
+        return self
+
+    def __exit__(self,
+                 exc_type: typing.Optional[typing.Type[BaseException]],
+                 exc_val: typing.Optional[BaseException],
+                 exc_tb: typing.Optional[TracebackType]
+                 ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the underlying session and its pooled connections.
+        """
+        self.session.close()
 
     def _request(self,
                  endpoint: str,
@@ -183,10 +222,13 @@ class NattkaBugzilla(object):
     def whoami(self) -> str:
         """
         Cache and return username for the current Bugzilla user.
+
+        The username is requested from Bugzilla on the first call only,
+        subsequent calls return the cached value.
         """
-        username = self._request('whoami').json()['name']
-        self.username = username
-        return username
+        if self.username is None:
+            self.username = self._request('whoami').json()['name']
+        return self.username
 
     def find_bugs(self,
                   bugs: typing.Iterable[int] = [],
@@ -234,12 +276,8 @@ class NattkaBugzilla(object):
             search_params['id'] = list(str(x) for x in bugs)
 
         if category:
-            products = set()
-            components = set()
-            for cat in category:
-                prod, comp = BugCategory.to_products_components(cat)
-                products.update(prod)
-                components.update(comp)
+            products, components = category_search_params(
+                frozenset(category))
             search_params['product'] = list(products)
             search_params['component'] = list(components)
 
@@ -307,9 +345,7 @@ class NattkaBugzilla(object):
         """
 
         if username is None:
-            if self.username is None:
-                self.whoami()
-            username = self.username
+            username = self.whoami()
 
         resp = self._request(f'bug/{bugno}/comment').json()
         for c in reversed(resp['bugs'][str(bugno)]['comments']):
@@ -325,7 +361,7 @@ class NattkaBugzilla(object):
                       keywords_add: typing.List[str] = [],
                       keywords_remove: typing.List[str] = [],
                       new_package_list: typing.List[str] = []
-                      ) -> None:
+                      ) -> typing.Dict[str, typing.Dict[str, str]]:
         """
         Update the sanity-check status of bug
 
@@ -338,6 +374,9 @@ class NattkaBugzilla(object):
         the package list will be updated to combination of its all
         elements.  All old comments left by the user will be marked
         obsolete.
+
+        Return the dict of field changes reported by Bugzilla, mapping
+        field names to dicts with 'added' and 'removed' values.
         """
 
         if status is True:
@@ -377,7 +416,7 @@ class NattkaBugzilla(object):
 
         # mark old comments obsolete first
         resp = self._request(f'bug/{bugno}/comment').json()
-        username = self.username or self.whoami()
+        username = self.whoami()
         for c in resp['bugs'][str(bugno)]['comments']:
             if c['creator'] == username and 'obsolete' not in c['tags']:
                 creq = {
@@ -390,6 +429,7 @@ class NattkaBugzilla(object):
 
         resp = self._request(f'bug/{bugno}', put_data=req).json()
         assert resp['bugs'][0]['id'] == bugno
+        return resp['bugs'][0]['changes']
 
     def resolve_bug(self,
                     bugno: int,
@@ -476,6 +516,10 @@ def arches_from_cc(cc: typing.Iterable[str],
     order.
     """
 
+    # nothing to match if CC is empty, do not bother building sets
+    if not cc:
+        return []
+
     # bug.cc may contain full emails when authorized with an API key
     # or just login names
     cc_names = frozenset(x.split('@', 1)[0] for x in cc
@@ -4,6 +4,7 @@
 """Dependency graph support"""
 
 import enum
+import graphlib
 import typing
 
 import networkx as nx
@@ -47,26 +48,35 @@ def get_ordered_nodes(graph: nx.DiGraph,
     """
     Get ordered list of packages from dependency graph
 
-    Attempt to get DFS ordered list of dependencies from dependency
-    graph `graph`.
+    Attempt to get topologically ordered list of dependencies
+    from dependency graph `graph`, with dependencies coming before
+    the packages depending on them.  Cycles are eliminated first,
+    by hiding the weakest edge of each of them.  `graph` itself
+    is not modified.
 
     `cycle_observer` is a callback for debugging.  It is called every
     time a cycle is about to be eliminated, and passed a tuple
     with the cycle and the edge being eliminated.
     """
 
+    removed_edges: typing.Set[Edge] = set()
+    view = nx.subgraph_view(
+        graph, filter_edge=lambda u, v: (u, v) not in removed_edges)
     try:
         while True:
-            cycle = nx.find_cycle(graph)
+            cycle = nx.find_cycle(view)
             # resolve the cycle by eliminating the weakest edge
             weakest_edge = max(cycle, key=EdgeKeyGetter(graph))
             if cycle_observer:
                 cycle_observer((cycle, weakest_edge))
-            graph.remove_edge(*weakest_edge)
+            removed_edges.add(weakest_edge)
     except nx.NetworkXNoCycle:
         pass
 
-    return nx.dfs_postorder_nodes(graph)
+    # successors are dependencies, i.e. they need to go first
+    sorter: graphlib.TopologicalSorter[str] = graphlib.TopologicalSorter(
+        {node: view.successors(node) for node in view})
+    return iter(sorter.static_order())
 
 
 def traverse_dependencies(dep: pkgcore.restrictions.restriction.base,
@@ -93,22 +103,26 @@ def get_depgraph_for_packages(pkgs: typing.Iterable[
     Get DiGraph for packages from `pkgs`
     """
 
-    graph = nx.DiGraph()
-
-    # add nodes for all package keys
-    graph.add_nodes_from(x.key for x in pkgs)
+    keys = [x.key for x in pkgs]
+    key_set = frozenset(keys)
 
-    # connect nodes via dependencies
+    # collect the strongest dependency for every pair of packages
+    edges: typing.Dict[Edge, EdgeKey] = {}
     for pkg in pkgs:
         for deptype in DepType:
             deps = getattr(pkg, deptype.name.lower())
             for dep, level in traverse_dependencies(deps):
-                if dep not in graph.nodes():
+                if dep not in key_set:
                     continue
-                existing = graph.get_edge_data(pkg.key, dep)
-                if (existing is None
-                        or (deptype, level) < (existing['dep'],
-                                               existing['level'])):
-                    graph.add_edge(pkg.key, dep, dep=deptype, level=level)
+                edge = (pkg.key, dep)
+                existing = edges.get(edge)
+                if existing is None or (deptype, level) < existing:
+                    edges[edge] = (deptype, level)
 
+    graph = nx.DiGraph()
+    # add nodes for all package keys
+    graph.add_nodes_from(keys)
+    # connect nodes via dependencies
+    graph.add_edges_from((u, v, {'dep': deptype, 'level': level})
+                         for (u, v), (deptype, level) in edges.items())
     return graph
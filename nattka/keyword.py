@@ -36,14 +36,18 @@ def keyword_sort_key(kw: str
 
 
 def update_copyright(copyright_line: str,
-                     target_year: int = datetime.datetime.utcnow().year,
+                     target_year: typing.Optional[int] = None,
                      ) -> str:
     """
     Update copyright date and owner in `copyright_line`.
+
+    `target_year` defaults to the current year.
     """
 
     m = COPYRIGHT_RE.match(copyright_line)
     if m is not None:
+        if target_year is None:
+            target_year = datetime.datetime.utcnow().year
         pre, y1, y2, owner, post = m.groups()
         year = str(target_year)
         if not y1 and y2 != year:
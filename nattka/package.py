@@ -239,7 +239,11 @@ def match_package_list(repo: UnconfiguredTree,
 
     valid_arches = frozenset(repo.known_arches)
     cc_arches = arches_from_cc(bug.cc, valid_arches)
+    cc_arches_set = frozenset(cc_arches)
     filter_arch = frozenset(filter_arch)
+    streq = bug.category == BugCategory.STABLEREQ
+    allarches = (permit_allarches and streq
+                 and 'ALLARCHES' in bug.keywords)
 
     keyworded_already = False
     filtered = False
@@ -262,8 +266,6 @@ def match_package_list(repo: UnconfiguredTree,
             except MalformedAtom:
                 pass
 
-        streq = bug.category == BugCategory.STABLEREQ
-
         if dep is None or dep.blocks or dep.use or dep.slot_operator:
             raise PackageInvalid(
                 f'invalid package spec: {sdep}')
@@ -305,7 +307,7 @@ def match_package_list(repo: UnconfiguredTree,
             keywords = cc_arches
         elif cc_arches:
             # filter through CC list
-            keywords = [x for x in keywords if x in cc_arches]
+            keywords = [x for x in keywords if x in cc_arches_set]
             # skip packages that are no longer relevant to CC
             if not keywords:
                 continue
@@ -322,8 +324,7 @@ def match_package_list(repo: UnconfiguredTree,
         # we still do filtering with ALLARCHES since the requested
         # arches may be disjoint with ALLARCHES candidates
         allarches_kw: typing.FrozenSet[str] = frozenset()
-        if (permit_allarches and bug.category == BugCategory.STABLEREQ
-                and 'ALLARCHES' in bug.keywords):
+        if allarches:
             # this is called only in 'apply' command
             assert filter_arch
             # ALLARCHES keywords are the same as `*`
@@ -388,7 +389,7 @@ def expand_package_list(repo: UnconfiguredTree,
     is known to have a valid package list.
     """
 
-    ret = ''
+    ret: typing.List[str] = []
     prev_kw = None
     for line in bug.atoms.splitlines(keepends=True):
         it = iter(WS_RE.split(line))
@@ -397,7 +398,7 @@ def expand_package_list(repo: UnconfiguredTree,
         had_empty_above = False
         for w in it:
             if w.startswith('#'):
-                ret += w
+                ret.append(w)
                 break
             if w.strip() and pkg is None:
                 dep = None
@@ -439,14 +440,14 @@ def expand_package_list(repo: UnconfiguredTree,
                         raise ExpandImpossible(
                             'keywords along with empty ^')
                     cur_kw.append(w)
-            ret += w
+            ret.append(w)
         if cur_kw is not None:
             prev_kw = cur_kw[1:]
 
         # copy remaining part
-        ret += ''.join(it)
+        ret.extend(it)
 
-    return ret
+    return ''.join(ret)
 
 
 def add_keywords(tuples: PackageKeywordsIterable,
@@ -4,16 +4,18 @@
 """ Tests for Bugzilla interaction. """
 
 import datetime
+import functools
+import os
+import types
 import typing
 import unittest
+import unittest.mock
 
 from pathlib import Path
 
-import vcr
-
 from nattka.bugzilla import (BugRuntimeTestingState, NattkaBugzilla,
                              BugCategory, BugInfo, arches_from_cc,
-                             split_dependent_bugs)
+                             category_search_params, split_dependent_bugs)
 
 
 API_ENDPOINT = 'http://127.0.0.1:33113/rest'
@@ -22,250 +24,266 @@ USER_API_KEY = 'dhaGUYKZOGGVRmg4k24wEXaWRHntUjIlW6eqePu1'
 BUGZILLA_USERNAME = 'nattka' + '@gentoo.org'
 USER_BUGZILLA_USERNAME = 'test@example.com'
 
-rec = vcr.VCR(
-    cassette_library_dir=str(Path(__file__).parent / 'bugzilla'),
-    filter_query_parameters=['Bugzilla_api_key'],
-    record_mode='once',
-    match_on=['method', 'scheme', 'host', 'port', 'path', 'query',
-              'body'],
-)
-
-
-class BugzillaTests(unittest.TestCase):
+ALPHA_EMAIL = 'alpha@gentoo.org'
+AMD64_EMAIL = 'amd64@gentoo.org'
+HPPA_EMAIL = 'hppa@gentoo.org'
+X86_EMAIL = 'x86@gentoo.org'
+
+
+@functools.cache
+def get_recorder():
+    """
+    Return the VCR instance used to replay Bugzilla cassettes
+
+    vcr is imported lazily, so that it is not loaded unless Bugzilla
+    tests are actually run.  The record mode can be overridden via
+    the NATTKA_VCR_MODE environment variable.  It defaults to strict
+    replay ("none") on CI, and to recording missing cassettes ("once")
+    otherwise.
+    """
+
+    import vcr
+
+    return vcr.VCR(
+        cassette_library_dir=str(Path(__file__).parent / 'bugzilla'),
+        filter_query_parameters=['Bugzilla_api_key'],
+        record_mode=os.environ.get('NATTKA_VCR_MODE',
+                                   'none' if os.environ.get('CI')
+                                   else 'once'),
+        serializer='json',
+        decode_compressed_response=True,
+        match_on=('method', 'path', 'query', 'body'),
+    )
+
+
+EXPECTED_BUGS: typing.Mapping[int, BugInfo] = types.MappingProxyType({
+    1: BugInfo(None, '\r\n', blocks=(2,),
+               assigned_to='test@example.com',
+               last_change_time=datetime.datetime(
+                   2020, 4, 3, 13, 22, 41)),
+    2: BugInfo(BugCategory.KEYWORDREQ,
+               'dev-python/unittest-mixins-1.6\r\n'
+               'dev-python/coverage-4.5.4\r\n',
+               (ALPHA_EMAIL, HPPA_EMAIL),
+               depends=(1,),
+               blocks=(9,),
+               sanity_check=True,
+               assigned_to='test@example.com',
+               last_change_time=datetime.datetime(
+                   2020, 4, 3, 13, 34, 59)),
+    3: BugInfo(BugCategory.STABLEREQ,
+               'dev-python/mako-1.1.0 amd64\r\n',
+               (AMD64_EMAIL,),
+               depends=(7,),
+               keywords=('STABLEREQ',),
+               sanity_check=False,
+               assigned_to='bug-wranglers@gentoo.org',
+               last_change_time=datetime.datetime(
+                   2020, 11, 26, 9, 42, 55),
+               runtime_testing_required=(
+                   BugRuntimeTestingState.MANUAL)),
+    4: BugInfo(BugCategory.KEYWORDREQ,
+               'dev-python/urllib3-1.25.8\r\n'
+               'dev-python/trustme-0.6.0\r\n'
+               'dev-python/brotlipy-0.7.0\r\n',
+               (HPPA_EMAIL,),
+               keywords=('KEYWORDREQ',),
+               assigned_to='test@example.com',
+               last_change_time=datetime.datetime(
+                   2020, 4, 3, 13, 34, 55),
+               runtime_testing_required=(
+                   BugRuntimeTestingState.YES)),
+    5: BugInfo(None,
+               'app-arch/arj-3.10.22-r7 amd64 hppa\r\n',
+               ('test@example.com',),
+               whiteboard='test whiteboard',
+               security=True,
+               assigned_to='test@example.com',
+               last_change_time=datetime.datetime(
+                   2020, 4, 10, 9, 47, 22),
+               runtime_testing_required=(
+                   BugRuntimeTestingState.YES)),
+    6: BugInfo(None,
+               'sys-kernel/gentoo-sources-4.1.6\r\n',
+               security=True,
+               assigned_to='test@example.com',
+               last_change_time=datetime.datetime(
+                   2020, 4, 3, 13, 31, 19),
+               runtime_testing_required=(
+                   BugRuntimeTestingState.YES)),
+    7: BugInfo(BugCategory.STABLEREQ,
+               'dev-python/pytest-5.4.1\r\n',
+               blocks=(3,),
+               keywords=('ALLARCHES',),
+               assigned_to='test@example.com',
+               last_change_time=datetime.datetime(
+                   2020, 4, 3, 13, 28, 17),
+               runtime_testing_required=(
+                   BugRuntimeTestingState.YES)),
+    8: BugInfo(BugCategory.STABLEREQ,
+               'dev-lang/python-3.7.7\r\n',
+               resolved=True,
+               assigned_to='test@example.com',
+               last_change_time=datetime.datetime(
+                   2020, 4, 4, 7, 7, 56)),
+    9: BugInfo(BugCategory.KEYWORDREQ,
+               'dev-python/frobnicate-11\r\n',
+               depends=(2,),
+               assigned_to='test@example.com',
+               last_change_time=datetime.datetime(
+                   2020, 4, 5, 14, 35, 59)),
+})
+
+
+@functools.cache
+def get_expected_bugs(req: typing.FrozenSet[int]
+                      ) -> typing.Mapping[int, BugInfo]:
+    """Return a read-only subset of EXPECTED_BUGS, cached per @req"""
+    return types.MappingProxyType(
+        {k: v for k, v in EXPECTED_BUGS.items() if k in req})
+
+
+class BugzillaTestCase(unittest.TestCase):
+    """
+    Base class for tests replaying recorded Bugzilla sessions.
+
+    By default, the cassette named after the test method is entered
+    in setUp(), rather than via a decorator on every method.  Classes
+    that do not modify Bugzilla state can set class_cassette to replay
+    all their tests from a single cassette, entered once per class.
+    Recorded interactions can be replayed repeatedly from it, so that
+    tests do not depend on each other or on the order they are run in.
+    The client instance is shared by all tests in the class.
+    """
+
+    api_key = API_KEY
+    class_cassette: typing.Optional[str] = None
     bz: NattkaBugzilla
     maxDiff = None
 
+    @classmethod
+    def setUpClass(cls):
+        cls.bz = NattkaBugzilla(cls.api_key, API_ENDPOINT)
+        if cls.class_cassette is not None:
+            cassette = get_recorder().use_cassette(
+                f'{cls.class_cassette}.json',
+                allow_playback_repeats=True)
+            cassette.__enter__()
+            cls.addClassCleanup(cassette.__exit__, None, None, None)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bz.close()
+
     def setUp(self):
-        self.bz = NattkaBugzilla(API_KEY, API_ENDPOINT)
+        if self.class_cassette is None:
+            cassette = get_recorder().use_cassette(
+                f'{self._testMethodName}.json')
+            cassette.__enter__()
+            self.addCleanup(cassette.__exit__, None, None, None)
+        # the client is shared, reset the whoami() result
+        self.bz.username = None
+
+
+class BugzillaTests(BugzillaTestCase):
+    class_cassette = 'BugzillaTests'
 
     def get_bugs(self,
                  req: typing.Iterable[int]
-                 ) -> typing.Dict[int, BugInfo]:
+                 ) -> typing.Mapping[int, BugInfo]:
         """Return expected data for specified bugs"""
-        bugs = {1: BugInfo(None, '\r\n', blocks=[2],
-                           assigned_to='test@example.com',
-                           last_change_time=datetime.datetime(
-                               2020, 4, 3, 13, 22, 41)),
-                2: BugInfo(BugCategory.KEYWORDREQ,
-                           'dev-python/unittest-mixins-1.6\r\n'
-                           'dev-python/coverage-4.5.4\r\n',
-                           [f'{x}@gentoo.org' for x in ('alpha',
-                                                        'hppa')],
-                           depends=[1],
-                           blocks=[9],
-                           sanity_check=True,
-                           assigned_to='test@example.com',
-                           last_change_time=datetime.datetime(
-                               2020, 4, 3, 13, 34, 59)),
-                3: BugInfo(BugCategory.STABLEREQ,
-                           'dev-python/mako-1.1.0 amd64\r\n',
-                           [f'{x}@gentoo.org' for x in ('amd64',)],
-                           depends=[7],
-                           keywords=['STABLEREQ'],
-                           sanity_check=False,
-                           assigned_to='bug-wranglers@gentoo.org',
-                           last_change_time=datetime.datetime(
-                               2020, 11, 26, 9, 42, 55),
-                           runtime_testing_required=(
-                               BugRuntimeTestingState.MANUAL)),
-                4: BugInfo(BugCategory.KEYWORDREQ,
-                           'dev-python/urllib3-1.25.8\r\n'
-                           'dev-python/trustme-0.6.0\r\n'
-                           'dev-python/brotlipy-0.7.0\r\n',
-                           [f'{x}@gentoo.org' for x in ('hppa',)],
-                           keywords=['KEYWORDREQ'],
-                           assigned_to='test@example.com',
-                           last_change_time=datetime.datetime(
-                               2020, 4, 3, 13, 34, 55),
-                           runtime_testing_required=(
-                               BugRuntimeTestingState.YES)),
-                5: BugInfo(None,
-                           'app-arch/arj-3.10.22-r7 amd64 hppa\r\n',
-                           ['test@example.com'],
-                           whiteboard='test whiteboard',
-                           security=True,
-                           assigned_to='test@example.com',
-                           last_change_time=datetime.datetime(
-                               2020, 4, 10, 9, 47, 22),
-                           runtime_testing_required=(
-                               BugRuntimeTestingState.YES)),
-                6: BugInfo(None,
-                           'sys-kernel/gentoo-sources-4.1.6\r\n',
-                           security=True,
-                           assigned_to='test@example.com',
-                           last_change_time=datetime.datetime(
-                               2020, 4, 3, 13, 31, 19),
-                           runtime_testing_required=(
-                               BugRuntimeTestingState.YES)),
-                7: BugInfo(BugCategory.STABLEREQ,
-                           'dev-python/pytest-5.4.1\r\n',
-                           blocks=[3],
-                           keywords=['ALLARCHES'],
-                           assigned_to='test@example.com',
-                           last_change_time=datetime.datetime(
-                               2020, 4, 3, 13, 28, 17),
-                           runtime_testing_required=(
-                               BugRuntimeTestingState.YES)),
-                8: BugInfo(BugCategory.STABLEREQ,
-                           'dev-lang/python-3.7.7\r\n',
-                           resolved=True,
-                           assigned_to='test@example.com',
-                           last_change_time=datetime.datetime(
-                               2020, 4, 4, 7, 7, 56)),
-                9: BugInfo(BugCategory.KEYWORDREQ,
-                           'dev-python/frobnicate-11\r\n',
-                           depends=[2],
-                           assigned_to='test@example.com',
-                           last_change_time=datetime.datetime(
-                               2020, 4, 5, 14, 35, 59)),
-                }
-        for k in list(bugs):
-            if k not in req:
-                del bugs[k]
-        return bugs
-
-    @rec.use_cassette()
+        return get_expected_bugs(frozenset(req))
+
+    def assertBugsEqual(self,
+                        got: typing.Mapping[int, BugInfo],
+                        expected: typing.Mapping[int, BugInfo]
+                        ) -> None:
+        """Compare bug dicts key-wise, to report differing bugs only"""
+        self.assertEqual(sorted(got), sorted(expected))
+        for k, v in expected.items():
+            self.assertEqual(got[k], v, f'bug {k}')
+
     def test_whoami(self):
         """ Test whoami(). """
-        self.assertEqual(self.bz.whoami(), BUGZILLA_USERNAME)
-        self.assertEqual(self.bz.username, BUGZILLA_USERNAME)
+        with unittest.mock.patch.object(self.bz, '_request',
+                                        wraps=self.bz._request) as req:
+            self.assertEqual(self.bz.whoami(), BUGZILLA_USERNAME)
+            self.assertEqual(self.bz.username, BUGZILLA_USERNAME)
+            # the second call must be served from cache
+            self.assertEqual(self.bz.whoami(), BUGZILLA_USERNAME)
+            req.assert_called_once()
 
-    @rec.use_cassette()
     def test_fetch_bugs(self):
-        """ Test getting simple bugs. """
-        self.assertEqual(
-            self.bz.find_bugs([1, 2, 3, 4, 8]),
-            self.get_bugs([1, 2, 3, 4, 8]))
-
-    @rec.use_cassette()
-    def test_fetch_bugs_keywordreq(self):
-        """Test getting and filtering to keywordreqs."""
-        self.assertEqual(
-            self.bz.find_bugs([1, 2, 3, 4, 8],
-                              category=[BugCategory.KEYWORDREQ]),
-            self.get_bugs([2, 4]))
-
-    @rec.use_cassette()
-    def test_fetch_bugs_stablereq(self):
-        """Test getting and filtering to stablereqs."""
-        self.assertEqual(
-            self.bz.find_bugs([1, 2, 3, 4, 8],
-                              category=[BugCategory.STABLEREQ]),
-            self.get_bugs([3, 8]))
-
-    @rec.use_cassette()
-    def test_fetch_bugs_any(self):
-        """Test getting and filtering to keywordreqs and stablereqs."""
-        self.assertEqual(
-            self.bz.find_bugs([1, 2, 3, 4, 8],
-                              category=[BugCategory.KEYWORDREQ,
-                                        BugCategory.STABLEREQ]),
-            self.get_bugs([2, 3, 4, 8]))
-
-    @rec.use_cassette()
-    def test_fetch_sanity_check_passed(self):
-        """Test filtering bugs by sanity-check+."""
-        self.assertEqual(
-            self.bz.find_bugs(bugs=[2, 3, 4, 6],
-                              sanity_check=[True]),
-            self.get_bugs([2]))
-
-    @rec.use_cassette()
-    def test_fetch_sanity_check_failed(self):
-        """Test filtering bugs by sanity-check-."""
-        self.assertEqual(
-            self.bz.find_bugs(bugs=[2, 3, 4, 6],
-                              sanity_check=[False]),
-            self.get_bugs([3]))
-
-    @rec.use_cassette()
-    def test_fetch_sanity_check_both(self):
-        """Test filtering bugs by sanity-check+/-."""
-        self.assertEqual(
-            self.bz.find_bugs(bugs=[2, 3, 4, 6],
-                              sanity_check=[True, False]),
-            self.get_bugs([2, 3]))
-
-    @rec.use_cassette()
-    def test_fetch_bugs_cc(self):
-        """Test filtering bugs by CC."""
-        self.assertEqual(
-            self.bz.find_bugs([1, 3, 4, 8],
-                              cc=['hppa@gentoo.org']),
-            self.get_bugs([4]))
-
-    @rec.use_cassette()
-    def test_find_keywordreqs(self):
-        """ Test finding keywordreqs. """
-        self.assertEqual(
-            self.bz.find_bugs(category=[BugCategory.KEYWORDREQ]),
-            self.get_bugs([2, 4, 9]))
-
-    @rec.use_cassette()
-    def test_find_stablereqs(self):
-        """ Test finding stablereqs. """
-        self.assertEqual(
-            self.bz.find_bugs(category=[BugCategory.STABLEREQ]),
-            self.get_bugs([3, 7, 8]))
-
-    @rec.use_cassette()
-    def test_find_bugs_cc(self):
-        """Test finding bugs by CC."""
-        self.assertEqual(
-            self.bz.find_bugs(cc=['hppa@gentoo.org']),
-            self.get_bugs([2, 4]))
-
-    @rec.use_cassette()
-    def test_find_sanity_check_passed(self):
-        """Test finding bugs that are flagged sanity-check+."""
-        self.assertEqual(
-            self.bz.find_bugs(sanity_check=[True]),
-            self.get_bugs([2]))
-
-    @rec.use_cassette()
-    def test_find_sanity_check_failed(self):
-        """Test finding bugs that are flagged sanity-check-."""
-        self.assertEqual(
-            self.bz.find_bugs(sanity_check=[False]),
-            self.get_bugs([3]))
-
-    @rec.use_cassette()
-    def test_find_sanity_check_both(self):
-        """Test finding bugs that are flagged sanity-check+ or -."""
-        self.assertEqual(
-            self.bz.find_bugs(sanity_check=[True, False]),
-            self.get_bugs([2, 3]))
-
-    @rec.use_cassette()
-    def test_find_bugs_personal_tags(self):
-        """Test finding bugs by personal tags."""
-        self.assertEqual(
-            self.bz.find_bugs(skip_tags=['nattka:skip']),
-            self.get_bugs([1, 2, 4, 5, 6, 7, 8, 9]))
-
-    @rec.use_cassette()
-    def test_find_bugs_unresolved(self):
-        """Test finding unresolved bugs"""
-        self.assertEqual(
-            self.bz.find_bugs(unresolved=True),
-            self.get_bugs([1, 2, 3, 4, 5, 6, 7, 9]))
+        """Test getting bugs by number, with and without filters."""
+        # all variants are recorded into a single cassette, matched
+        # by query string; filtering is still done server-side
+        cases: typing.List[typing.Tuple[typing.List[int],
+                                        typing.Dict[str, typing.Any],
+                                        typing.List[int]]] = [
+            ([1, 2, 3, 4, 8], {},
+             [1, 2, 3, 4, 8]),
+            ([1, 2, 3, 4, 8], {'category': [BugCategory.KEYWORDREQ]},
+             [2, 4]),
+            ([1, 2, 3, 4, 8], {'category': [BugCategory.STABLEREQ]},
+             [3, 8]),
+            ([1, 2, 3, 4, 8], {'category': [BugCategory.KEYWORDREQ,
+                                            BugCategory.STABLEREQ]},
+             [2, 3, 4, 8]),
+            ([2, 3, 4, 6], {'sanity_check': [True]},
+             [2]),
+            ([2, 3, 4, 6], {'sanity_check': [False]},
+             [3]),
+            ([2, 3, 4, 6], {'sanity_check': [True, False]},
+             [2, 3]),
+            ([1, 3, 4, 8], {'cc': [HPPA_EMAIL]},
+             [4]),
+        ]
+        for bugs, kwargs, expected in cases:
+            with self.subTest(bugs=bugs, **kwargs):
+                self.assertBugsEqual(
+                    self.bz.find_bugs(bugs, **kwargs),
+                    self.get_bugs(expected))
+
+    def test_find_bugs(self):
+        """Test searching for bugs using different filters."""
+        cases: typing.List[typing.Tuple[typing.Dict[str, typing.Any],
+                                        typing.List[int]]] = [
+            ({'category': [BugCategory.KEYWORDREQ]},
+             [2, 4, 9]),
+            ({'category': [BugCategory.STABLEREQ]},
+             [3, 7, 8]),
+            ({'cc': [HPPA_EMAIL]},
+             [2, 4]),
+            ({'sanity_check': [True]},
+             [2]),
+            ({'sanity_check': [False]},
+             [3]),
+            ({'sanity_check': [True, False]},
+             [2, 3]),
+            ({'skip_tags': ['nattka:skip']},
+             [1, 2, 4, 5, 6, 7, 8, 9]),
+            ({'unresolved': True},
+             [1, 2, 3, 4, 5, 6, 7, 9]),
+        ]
+        for kwargs, expected in cases:
+            with self.subTest(**kwargs):
+                self.assertBugsEqual(
+                    self.bz.find_bugs(**kwargs),
+                    self.get_bugs(expected))
 
-    @rec.use_cassette()
     def test_resolve_dependencies(self):
         """Test resolving missing dependencies recursively"""
         bz = self.bz.find_bugs([9])
-        self.assertEqual(
+        self.assertBugsEqual(
             self.bz.resolve_dependencies(bz),
             self.get_bugs([1, 2, 9]))
 
-    @rec.use_cassette()
     def test_get_latest_comment(self):
         """ Test getting latest self-comment. """
         self.assertEqual(
             self.bz.get_latest_comment(3, BUGZILLA_USERNAME),
             'sanity check failed!')
 
-    @rec.use_cassette()
     def test_get_latest_comment_whoami(self):
         """ Test getting latest self-comment with whoami(). """
         self.assertEqual(
@@ -273,14 +291,7 @@ class BugzillaTests(unittest.TestCase):
             'sanity check failed!')
 
 
-class DestructiveBugzillaTests(unittest.TestCase):
-    bz: NattkaBugzilla
-    maxDiff = None
-
-    def setUp(self):
-        self.bz = NattkaBugzilla(API_KEY, API_ENDPOINT)
-
-    @rec.use_cassette()
+class DestructiveBugzillaTests(BugzillaTestCase):
     def test_set_status(self):
         """Test setting sanity-check status"""
         self.assertIsNone(
@@ -290,14 +301,13 @@ class DestructiveBugzillaTests(unittest.TestCase):
             self.bz.get_latest_comment(5, BUGZILLA_USERNAME),
             'Bugzilla instance tainted, please reset')
 
-        self.bz.update_status(5, True)
+        self.assertEqual(
+            self.bz.update_status(5, True),
+            {'flagtypes.name': {'added': 'sanity-check+', 'removed': ''}})
 
-        self.assertTrue(
-            self.bz.find_bugs([5])[5].sanity_check)
         self.assertIsNone(
             self.bz.get_latest_comment(5, BUGZILLA_USERNAME))
 
-    @rec.use_cassette()
     def test_set_status_and_mark_obsolete(self):
         """Test setting sanity-check status and marking comments obsolete"""
         self.assertFalse(
@@ -314,7 +324,6 @@ class DestructiveBugzillaTests(unittest.TestCase):
         self.assertIsNotNone(
             self.bz.get_latest_comment(3, BUGZILLA_USERNAME))
 
-    @rec.use_cassette()
     def test_set_status_and_comment(self):
         """Test setting sanity-check status and commenting"""
         self.assertIsNone(
@@ -324,15 +333,14 @@ class DestructiveBugzillaTests(unittest.TestCase):
             self.bz.get_latest_comment(6, BUGZILLA_USERNAME),
             'Bugzilla instance tainted, please reset')
 
-        self.bz.update_status(6, False, 'sanity check failed!\r\n')
+        self.assertEqual(
+            self.bz.update_status(6, False, 'sanity check failed!\r\n'),
+            {'flagtypes.name': {'added': 'sanity-check-', 'removed': ''}})
 
-        self.assertFalse(
-            self.bz.find_bugs([6])[6].sanity_check)
         self.assertEqual(
             self.bz.get_latest_comment(6, BUGZILLA_USERNAME),
             'sanity check failed!')
 
-    @rec.use_cassette()
     def test_reset_status(self):
         """Test resetting sanity-check status"""
         self.assertTrue(
@@ -342,14 +350,13 @@ class DestructiveBugzillaTests(unittest.TestCase):
             self.bz.get_latest_comment(2, BUGZILLA_USERNAME),
             'Bugzilla instance tainted, please reset')
 
-        self.bz.update_status(2, None)
+        self.assertEqual(
+            self.bz.update_status(2, None),
+            {'flagtypes.name': {'added': '', 'removed': 'sanity-check+'}})
 
-        self.assertIsNone(
-            self.bz.find_bugs([2])[2].sanity_check)
         self.assertIsNone(
             self.bz.get_latest_comment(2, BUGZILLA_USERNAME))
 
-    @rec.use_cassette()
     def test_set_status_and_cc(self):
         bug = self.bz.find_bugs([6])[6]
         self.assertIsNone(
@@ -357,22 +364,20 @@ class DestructiveBugzillaTests(unittest.TestCase):
             'Bugzilla instance tainted, please reset')
         self.assertEqual(
             bug.cc,
-            [],
+            (),
             'Bugzilla instance tainted, please reset')
         self.assertIsNone(
             self.bz.get_latest_comment(6, BUGZILLA_USERNAME),
             'Bugzilla instance tainted, please reset')
 
-        self.bz.update_status(6, True, cc_add=['amd64@gentoo.org',
-                                               'hppa@gentoo.org'])
+        self.bz.update_status(6, True, cc_add=[AMD64_EMAIL, HPPA_EMAIL])
 
         bug = self.bz.find_bugs([6])[6]
         self.assertTrue(bug.sanity_check)
-        self.assertEqual(bug.cc, ['amd64@gentoo.org', 'hppa@gentoo.org'])
+        self.assertEqual(bug.cc, (AMD64_EMAIL, HPPA_EMAIL))
         self.assertIsNone(
             self.bz.get_latest_comment(6, BUGZILLA_USERNAME))
 
-    @rec.use_cassette()
     def test_set_status_and_add_keywords(self):
         bug = self.bz.find_bugs([8])[8]
         self.assertIsNone(
@@ -380,7 +385,7 @@ class DestructiveBugzillaTests(unittest.TestCase):
             'Bugzilla instance tainted, please reset')
         self.assertEqual(
             bug.keywords,
-            [],
+            (),
             'Bugzilla instance tainted, please reset')
         self.assertIsNone(
             self.bz.get_latest_comment(8, BUGZILLA_USERNAME),
@@ -390,11 +395,10 @@ class DestructiveBugzillaTests(unittest.TestCase):
 
         bug = self.bz.find_bugs([8])[8]
         self.assertTrue(bug.sanity_check)
-        self.assertEqual(bug.keywords, ['ALLARCHES'])
+        self.assertEqual(bug.keywords, ('ALLARCHES',))
         self.assertIsNone(
             self.bz.get_latest_comment(8, BUGZILLA_USERNAME))
 
-    @rec.use_cassette()
     def test_set_status_and_remove_keywords(self):
         bug = self.bz.find_bugs([7])[7]
         self.assertIsNone(
@@ -402,7 +406,7 @@ class DestructiveBugzillaTests(unittest.TestCase):
             'Bugzilla instance tainted, please reset')
         self.assertEqual(
             bug.keywords,
-            ['ALLARCHES'],
+            ('ALLARCHES',),
             'Bugzilla instance tainted, please reset')
         self.assertIsNone(
             self.bz.get_latest_comment(7, BUGZILLA_USERNAME),
@@ -412,11 +416,10 @@ class DestructiveBugzillaTests(unittest.TestCase):
 
         bug = self.bz.find_bugs([7])[7]
         self.assertTrue(bug.sanity_check)
-        self.assertEqual(bug.keywords, [])
+        self.assertEqual(bug.keywords, ())
         self.assertIsNone(
             self.bz.get_latest_comment(7, BUGZILLA_USERNAME))
 
-    @rec.use_cassette()
     def test_set_status_and_package_list(self):
         bug = self.bz.find_bugs([9])[9]
         self.assertIsNone(
@@ -442,20 +445,15 @@ class DestructiveBugzillaTests(unittest.TestCase):
             self.bz.get_latest_comment(9, BUGZILLA_USERNAME))
 
 
-class DestructiveUserBugzillaTests(unittest.TestCase):
-    bz: NattkaBugzilla
-    maxDiff = None
-
-    def setUp(self):
-        self.bz = NattkaBugzilla(USER_API_KEY, API_ENDPOINT)
+class DestructiveUserBugzillaTests(BugzillaTestCase):
+    api_key = USER_API_KEY
 
-    @rec.use_cassette()
     def test_uncc_arch(self):
         """Test unCC-ing an arch from a bug without closing it"""
         bug = self.bz.find_bugs([2])[2]
         self.assertEqual(
             bug.cc,
-            ['alpha@gentoo.org', 'hppa@gentoo.org'],
+            (ALPHA_EMAIL, HPPA_EMAIL),
             'Bugzilla instance tainted, please reset')
         self.assertFalse(
             bug.resolved,
@@ -465,22 +463,21 @@ class DestructiveUserBugzillaTests(unittest.TestCase):
             '',  # initial comment
             'Bugzilla instance tainted, please reset')
 
-        self.bz.resolve_bug(2, ['hppa@gentoo.org'], 'hppa done')
+        self.bz.resolve_bug(2, [HPPA_EMAIL], 'hppa done')
 
         bug = self.bz.find_bugs([2])[2]
-        self.assertEqual(bug.cc, ['alpha@gentoo.org'])
+        self.assertEqual(bug.cc, (ALPHA_EMAIL,))
         self.assertFalse(bug.resolved)
         self.assertEqual(
             self.bz.get_latest_comment(2, USER_BUGZILLA_USERNAME),
             'hppa done')
 
-    @rec.use_cassette()
     def test_uncc_arch_not_cced(self):
         """Test unCC-ing an arch that is not CC-ed"""
         bug = self.bz.find_bugs([3])[3]
         self.assertEqual(
             bug.cc,
-            ['amd64@gentoo.org'],
+            (AMD64_EMAIL,),
             'Bugzilla instance tainted, please reset')
         self.assertFalse(
             bug.resolved,
@@ -490,22 +487,21 @@ class DestructiveUserBugzillaTests(unittest.TestCase):
             '',  # initial comment
             'Bugzilla instance tainted, please reset')
 
-        self.bz.resolve_bug(3, ['hppa@gentoo.org'], 'whut?!')
+        self.bz.resolve_bug(3, [HPPA_EMAIL], 'whut?!')
 
         bug = self.bz.find_bugs([3])[3]
-        self.assertEqual(bug.cc, ['amd64@gentoo.org'])
+        self.assertEqual(bug.cc, (AMD64_EMAIL,))
         self.assertFalse(bug.resolved)
         self.assertEqual(
             self.bz.get_latest_comment(3, USER_BUGZILLA_USERNAME),
             'whut?!')
 
-    @rec.use_cassette()
     def test_close(self):
         """Test unCC-ing an arch and closing the bug"""
         bug = self.bz.find_bugs([4])[4]
         self.assertEqual(
             bug.cc,
-            ['hppa@gentoo.org'],
+            (HPPA_EMAIL,),
             'Bugzilla instance tainted, please reset')
         self.assertFalse(
             bug.resolved,
@@ -516,28 +512,54 @@ class DestructiveUserBugzillaTests(unittest.TestCase):
             'Bugzilla instance tainted, please reset')
 
         self.bz.resolve_bug(4,
-                            ['hppa@gentoo.org'],
+                            [HPPA_EMAIL],
                             'hppa done\n\nall arches done, closing',
                             resolve=True)
 
         bug = self.bz.find_bugs([4])[4]
-        self.assertEqual(bug.cc, [])
+        self.assertEqual(bug.cc, ())
         self.assertTrue(bug.resolved)
         self.assertEqual(
             self.bz.get_latest_comment(4, USER_BUGZILLA_USERNAME),
             'hppa done\n\nall arches done, closing')
 
 
+class ContextManagerTests(unittest.TestCase):
+    def test_context_manager(self):
+        """Test that the session is closed on leaving the context."""
+        bz = NattkaBugzilla(API_KEY, API_ENDPOINT)
+        with unittest.mock.patch.object(bz.session, 'close',
+                                        wraps=bz.session.close) as close:
+            with bz as entered:
+                self.assertIs(entered, bz)
+                close.assert_not_called()
+            close.assert_called_once_with()
+
+    def test_close_twice(self):
+        """Test that closing the client repeatedly is harmless."""
+        bz = NattkaBugzilla(API_KEY, API_ENDPOINT)
+        with unittest.mock.patch.object(bz.session, 'close',
+                                        wraps=bz.session.close) as close:
+            bz.close()
+            bz.close()
+            self.assertEqual(close.call_count, 2)
+
+
 class ArchesFromCCTest(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(
+            arches_from_cc([], ['amd64', 'arm64', 'x86']),
+            [])
+
     def test_email(self):
         self.assertEqual(
-            arches_from_cc(['amd64@gentoo.org', 'x86@gentoo.org'],
+            arches_from_cc([AMD64_EMAIL, X86_EMAIL],
                            ['amd64', 'arm64', 'x86']),
             ['amd64', 'x86'])
 
     def test_email_extra(self):
         self.assertEqual(
-            arches_from_cc(['amd64@gentoo.org', 'example@gentoo.org',
+            arches_from_cc([AMD64_EMAIL, 'example@gentoo.org',
                             'x86@example.com'],
                            ['amd64', 'arm64', 'x86']),
             ['amd64'])
@@ -555,80 +577,76 @@ class ArchesFromCCTest(unittest.TestCase):
             ['amd64', 'x86'])
 
 
-class SplitDependentBugsTests(unittest.TestCase):
-    def test_empty(self):
-        self.assertEqual(
-            split_dependent_bugs(
-                {1: BugInfo(BugCategory.STABLEREQ, '')
-                 }, 1),
-            ([], []))
+class CategorySearchParamsTest(unittest.TestCase):
+    def test_single(self):
+        self.assertEqual(
+            category_search_params(frozenset([BugCategory.KEYWORDREQ])),
+            (('Gentoo Linux',), ('Keywording',)))
+
+    def test_both(self):
+        self.assertEqual(
+            category_search_params(frozenset([BugCategory.STABLEREQ,
+                                              BugCategory.KEYWORDREQ])),
+            (('Gentoo Linux',), ('Keywording', 'Stabilization')))
+
+
+SPLIT_DEPENDENT_BUGS_CASES: typing.List[
+        typing.Tuple[str, typing.Dict[int, BugInfo], int,
+                     typing.Tuple[typing.List[int], typing.List[int]]]] = [
+    ('empty',
+     {1: BugInfo(BugCategory.STABLEREQ, ''),
+      }, 1,
+     ([], [])),
+    ('kwreq',
+     {1: BugInfo(BugCategory.KEYWORDREQ, '', depends=(2,)),
+      2: BugInfo(BugCategory.KEYWORDREQ, '', depends=(3,), blocks=(1,)),
+      3: BugInfo(BugCategory.KEYWORDREQ, '', blocks=(2,)),
+      }, 1,
+     ([2, 3], [])),
+    ('streq',
+     {1: BugInfo(BugCategory.STABLEREQ, '', depends=(2,)),
+      2: BugInfo(BugCategory.STABLEREQ, '', depends=(3,), blocks=(1,)),
+      3: BugInfo(BugCategory.STABLEREQ, '', blocks=(2,)),
+      }, 1,
+     ([2, 3], [])),
+    ('kwreq_mixed',
+     {1: BugInfo(BugCategory.KEYWORDREQ, '', depends=(2,)),
+      2: BugInfo(BugCategory.STABLEREQ, '', depends=(3,), blocks=(1,)),
+      3: BugInfo(BugCategory.KEYWORDREQ, '', blocks=(2,)),
+      }, 1,
+     ([], [2])),
+    ('streq_mixed',
+     {1: BugInfo(BugCategory.STABLEREQ, '', depends=(2,)),
+      2: BugInfo(BugCategory.KEYWORDREQ, '', depends=(3,), blocks=(1,)),
+      3: BugInfo(BugCategory.STABLEREQ, '', blocks=(2,)),
+      }, 1,
+     ([], [2])),
+    ('common_dep',
+     {1: BugInfo(BugCategory.STABLEREQ, '', depends=(2, 3)),
+      2: BugInfo(BugCategory.STABLEREQ, '', depends=(4,), blocks=(1,)),
+      3: BugInfo(BugCategory.STABLEREQ, '', depends=(4,), blocks=(1,)),
+      4: BugInfo(BugCategory.STABLEREQ, '', blocks=(2, 3)),
+      }, 1,
+     ([2, 3, 4], [])),
+    ('regular',
+     {1: BugInfo(BugCategory.STABLEREQ, '', depends=(2,)),
+      2: BugInfo(None, '', blocks=(1,)),
+      }, 1,
+     ([], [2])),
+    ('regular_mixed',
+     {1: BugInfo(BugCategory.STABLEREQ, '', depends=(2, 3)),
+      2: BugInfo(None, '', depends=(4,), blocks=(1,)),
+      3: BugInfo(BugCategory.STABLEREQ, '', blocks=(1,)),
+      4: BugInfo(BugCategory.STABLEREQ, '', blocks=(2,)),
+      }, 1,
+     ([3], [2])),
+]
 
-    def test_kwreq(self):
-        self.assertEqual(
-            split_dependent_bugs(
-                {1: BugInfo(BugCategory.KEYWORDREQ, '', depends=[2]),
-                 2: BugInfo(BugCategory.KEYWORDREQ, '', depends=[3],
-                            blocks=[1]),
-                 3: BugInfo(BugCategory.KEYWORDREQ, '', blocks=[2]),
-                 }, 1),
-            ([2, 3], []))
-
-    def test_streq(self):
-        self.assertEqual(
-            split_dependent_bugs(
-                {1: BugInfo(BugCategory.STABLEREQ, '', depends=[2]),
-                 2: BugInfo(BugCategory.STABLEREQ, '', depends=[3],
-                            blocks=[1]),
-                 3: BugInfo(BugCategory.STABLEREQ, '', blocks=[2]),
-                 }, 1),
-            ([2, 3], []))
-
-    def test_kwreq_mixed(self):
-        self.assertEqual(
-            split_dependent_bugs(
-                {1: BugInfo(BugCategory.KEYWORDREQ, '', depends=[2]),
-                 2: BugInfo(BugCategory.STABLEREQ, '', depends=[3],
-                            blocks=[1]),
-                 3: BugInfo(BugCategory.KEYWORDREQ, '', blocks=[2]),
-                 }, 1),
-            ([], [2]))
-
-    def test_streq_mixed(self):
-        self.assertEqual(
-            split_dependent_bugs(
-                {1: BugInfo(BugCategory.STABLEREQ, '', depends=[2]),
-                 2: BugInfo(BugCategory.KEYWORDREQ, '', depends=[3],
-                            blocks=[1]),
-                 3: BugInfo(BugCategory.STABLEREQ, '', blocks=[2]),
-                 }, 1),
-            ([], [2]))
-
-    def test_common_dep(self):
-        self.assertEqual(
-            split_dependent_bugs(
-                {1: BugInfo(BugCategory.STABLEREQ, '', depends=[2, 3]),
-                 2: BugInfo(BugCategory.STABLEREQ, '', depends=[4],
-                            blocks=[1]),
-                 3: BugInfo(BugCategory.STABLEREQ, '', depends=[4],
-                            blocks=[1]),
-                 4: BugInfo(BugCategory.STABLEREQ, '', blocks=[2, 3]),
-                 }, 1),
-            ([2, 3, 4], []))
-
-    def test_regular(self):
-        self.assertEqual(
-            split_dependent_bugs(
-                {1: BugInfo(BugCategory.STABLEREQ, '', depends=[2]),
-                 2: BugInfo(None, '', blocks=[1]),
-                 }, 1),
-            ([], [2]))
 
-    def test_regular_mixed(self):
-        self.assertEqual(
-            split_dependent_bugs(
-                {1: BugInfo(BugCategory.STABLEREQ, '', depends=[2, 3]),
-                 2: BugInfo(None, '', depends=[4], blocks=[1]),
-                 3: BugInfo(BugCategory.STABLEREQ, '', blocks=[1]),
-                 4: BugInfo(BugCategory.STABLEREQ, '', blocks=[2]),
-                 }, 1),
-            ([3], [2]))
+class SplitDependentBugsTests(unittest.TestCase):
+    def test_split_dependent_bugs(self):
+        for name, bugdict, bugno, expected in SPLIT_DEPENDENT_BUGS_CASES:
+            with self.subTest(name):
+                self.assertEqual(
+                    split_dependent_bugs(bugdict, bugno),
+                    expected)
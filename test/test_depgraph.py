@@ -10,23 +10,24 @@ import unittest.mock
 try:
     import networkx as nx
 except ImportError:
-    nx = None
-else:
-    from nattka.depgraph import (DepType, CycleTuple, get_ordered_nodes,
-                                 traverse_dependencies,
-                                 get_depgraph_for_packages)
+    raise unittest.SkipTest('networkx required for depgraph support')
+
+from nattka.depgraph import (DepType, CycleTuple, get_ordered_nodes,
+                             traverse_dependencies,
+                             get_depgraph_for_packages)
 
 from test.test_package import BaseRepoTestCase
 
 
-@unittest.skipIf(nx is None, 'networkx required for depgraph support')
 class DepGraphOrderingTests(unittest.TestCase):
     def test_simple(self):
         """Test simple A -> B -> C graph"""
         graph = nx.DiGraph()
         graph.add_nodes_from('ABC')
-        graph.add_edge('A', 'B', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'C', dep=DepType.DEPEND, level=0)
+        graph.add_edges_from([
+            ('A', 'B', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'C', {'dep': DepType.DEPEND, 'level': 0}),
+        ])
         self.assertEqual(
             list(get_ordered_nodes(graph)),
             ['C', 'B', 'A'])
@@ -35,13 +36,16 @@ class DepGraphOrderingTests(unittest.TestCase):
         """Test graph with unconnected nodes"""
         graph = nx.DiGraph()
         graph.add_nodes_from('ABCD')
-        graph.add_edge('A', 'B', dep=DepType.DEPEND, level=0)
+        graph.add_edges_from([
+            ('A', 'B', {'dep': DepType.DEPEND, 'level': 0}),
+        ])
 
         out = list(get_ordered_nodes(graph))
         # verify that all nodes are present
         self.assertEqual(sorted(out), list('ABCD'))
         # verify relative order
-        self.assertLess(out.index('B'), out.index('A'))
+        pos = {node: i for i, node in enumerate(out)}
+        self.assertLess(pos['B'], pos['A'])
 
     def test_multi(self):
         """
@@ -56,12 +60,14 @@ class DepGraphOrderingTests(unittest.TestCase):
 
         graph = nx.DiGraph()
         graph.add_nodes_from('ABCDEFG')
-        graph.add_edge('A', 'B', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'C', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'D', dep=DepType.DEPEND, level=0)
-        graph.add_edge('A', 'E', dep=DepType.DEPEND, level=0)
-        graph.add_edge('E', 'F', dep=DepType.DEPEND, level=0)
-        graph.add_edge('A', 'G', dep=DepType.DEPEND, level=0)
+        graph.add_edges_from([
+            ('A', 'B', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'C', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'D', {'dep': DepType.DEPEND, 'level': 0}),
+            ('A', 'E', {'dep': DepType.DEPEND, 'level': 0}),
+            ('E', 'F', {'dep': DepType.DEPEND, 'level': 0}),
+            ('A', 'G', {'dep': DepType.DEPEND, 'level': 0}),
+        ])
 
         out = list(get_ordered_nodes(graph))
         # verify that all nodes are present
@@ -69,9 +75,10 @@ class DepGraphOrderingTests(unittest.TestCase):
         # A must always come last
         self.assertEqual(out[-1], 'A')
         # verify relative order
-        self.assertLess(out.index('C'), out.index('B'))
-        self.assertLess(out.index('D'), out.index('B'))
-        self.assertLess(out.index('F'), out.index('E'))
+        pos = {node: i for i, node in enumerate(out)}
+        self.assertLess(pos['C'], pos['B'])
+        self.assertLess(pos['D'], pos['B'])
+        self.assertLess(pos['F'], pos['E'])
 
     def test_cross(self):
         """
@@ -88,14 +95,16 @@ class DepGraphOrderingTests(unittest.TestCase):
 
         graph = nx.DiGraph()
         graph.add_nodes_from('ABCDEFG')
-        graph.add_edge('A', 'B', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'C', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'D', dep=DepType.DEPEND, level=0)
-        graph.add_edge('A', 'E', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'E', dep=DepType.DEPEND, level=0)
-        graph.add_edge('E', 'F', dep=DepType.DEPEND, level=0)
-        graph.add_edge('A', 'G', dep=DepType.DEPEND, level=0)
-        graph.add_edge('F', 'G', dep=DepType.DEPEND, level=0)
+        graph.add_edges_from([
+            ('A', 'B', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'C', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'D', {'dep': DepType.DEPEND, 'level': 0}),
+            ('A', 'E', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'E', {'dep': DepType.DEPEND, 'level': 0}),
+            ('E', 'F', {'dep': DepType.DEPEND, 'level': 0}),
+            ('A', 'G', {'dep': DepType.DEPEND, 'level': 0}),
+            ('F', 'G', {'dep': DepType.DEPEND, 'level': 0}),
+        ])
 
         out = list(get_ordered_nodes(graph))
         # verify that all nodes are present
@@ -103,11 +112,12 @@ class DepGraphOrderingTests(unittest.TestCase):
         # A must always come last
         self.assertEqual(out[-1], 'A')
         # verify relative order
-        self.assertLess(out.index('C'), out.index('B'))
-        self.assertLess(out.index('D'), out.index('B'))
-        self.assertLess(out.index('E'), out.index('B'))
-        self.assertLess(out.index('F'), out.index('E'))
-        self.assertLess(out.index('G'), out.index('F'))
+        pos = {node: i for i, node in enumerate(out)}
+        self.assertLess(pos['C'], pos['B'])
+        self.assertLess(pos['D'], pos['B'])
+        self.assertLess(pos['E'], pos['B'])
+        self.assertLess(pos['F'], pos['E'])
+        self.assertLess(pos['G'], pos['F'])
 
     def test_circular(self):
         """
@@ -119,24 +129,28 @@ class DepGraphOrderingTests(unittest.TestCase):
 
         graph = nx.DiGraph()
         graph.add_nodes_from('ABC')
-        graph.add_edge('A', 'B', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'C', dep=DepType.DEPEND, level=0)
-        graph.add_edge('C', 'A', dep=DepType.PDEPEND, level=0)
+        graph.add_edges_from([
+            ('A', 'B', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'C', {'dep': DepType.DEPEND, 'level': 0}),
+            ('C', 'A', {'dep': DepType.PDEPEND, 'level': 0}),
+        ])
 
         # check both forward and reverse graph to make sure it is
         # actually resolving circular dependencies and not just
         # producing incidentally correct output
         cycles: typing.List[CycleTuple] = []
         self.assertEqual(
-            list(get_ordered_nodes(graph.copy(), cycles.append)),
+            list(get_ordered_nodes(graph, cycles.append)),
             ['C', 'B', 'A'])
         self.assertEqual(
             cycles,
             [([('A', 'B'), ('B', 'C'), ('C', 'A')], ('C', 'A'))])
+        # the input graph must not be modified
+        self.assertTrue(graph.has_edge('C', 'A'))
 
         cycles = []
         self.assertEqual(
-            list(get_ordered_nodes(graph.reverse())),
+            list(get_ordered_nodes(graph.reverse(copy=False))),
             ['A', 'B', 'C'])
         self.assertEqual(
             cycles,
@@ -155,16 +169,18 @@ class DepGraphOrderingTests(unittest.TestCase):
 
         graph = nx.DiGraph()
         graph.add_nodes_from('ABCDEFG')
-        graph.add_edge('A', 'B', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'C', dep=DepType.DEPEND, level=0)
-        graph.add_edge('C', 'A', dep=DepType.RDEPEND, level=0)
-        graph.add_edge('A', 'D', dep=DepType.DEPEND, level=0)
-        graph.add_edge('D', 'E', dep=DepType.DEPEND, level=0)
-        graph.add_edge('D', 'F', dep=DepType.RDEPEND, level=0)
-        graph.add_edge('E', 'D', dep=DepType.PDEPEND, level=0)
-        graph.add_edge('A', 'F', dep=DepType.RDEPEND, level=0)
-        graph.add_edge('F', 'G', dep=DepType.DEPEND, level=0)
-        graph.add_edge('G', 'D', dep=DepType.DEPEND, level=0)
+        graph.add_edges_from([
+            ('A', 'B', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'C', {'dep': DepType.DEPEND, 'level': 0}),
+            ('C', 'A', {'dep': DepType.RDEPEND, 'level': 0}),
+            ('A', 'D', {'dep': DepType.DEPEND, 'level': 0}),
+            ('D', 'E', {'dep': DepType.DEPEND, 'level': 0}),
+            ('D', 'F', {'dep': DepType.RDEPEND, 'level': 0}),
+            ('E', 'D', {'dep': DepType.PDEPEND, 'level': 0}),
+            ('A', 'F', {'dep': DepType.RDEPEND, 'level': 0}),
+            ('F', 'G', {'dep': DepType.DEPEND, 'level': 0}),
+            ('G', 'D', {'dep': DepType.DEPEND, 'level': 0}),
+        ])
 
         cycles: typing.List[CycleTuple] = []
         out = list(get_ordered_nodes(graph, cycles.append))
@@ -173,10 +189,11 @@ class DepGraphOrderingTests(unittest.TestCase):
         # A must always come last
         self.assertEqual(out[-1], 'A')
         # verify relative order
-        self.assertLess(out.index('C'), out.index('B'))
-        self.assertLess(out.index('D'), out.index('G'))
-        self.assertLess(out.index('E'), out.index('D'))
-        self.assertLess(out.index('G'), out.index('F'))
+        pos = {node: i for i, node in enumerate(out)}
+        self.assertLess(pos['C'], pos['B'])
+        self.assertLess(pos['D'], pos['G'])
+        self.assertLess(pos['E'], pos['D'])
+        self.assertLess(pos['G'], pos['F'])
         # verify cycle resolution
         self.assertEqual(
             sorted(cycles),
@@ -195,16 +212,18 @@ class DepGraphOrderingTests(unittest.TestCase):
 
         graph = nx.DiGraph()
         graph.add_nodes_from('ABC')
-        graph.add_edge('A', 'B', dep=DepType.DEPEND, level=0)
-        graph.add_edge('B', 'C', dep=DepType.DEPEND, level=0)
-        graph.add_edge('C', 'A', dep=DepType.DEPEND, level=1)
+        graph.add_edges_from([
+            ('A', 'B', {'dep': DepType.DEPEND, 'level': 0}),
+            ('B', 'C', {'dep': DepType.DEPEND, 'level': 0}),
+            ('C', 'A', {'dep': DepType.DEPEND, 'level': 1}),
+        ])
 
         # check both forward and reverse graph to make sure it is
         # actually resolving circular dependencies and not just
         # producing incidentally correct output
         cycles: typing.List[CycleTuple] = []
         self.assertEqual(
-            list(get_ordered_nodes(graph.copy(), cycles.append)),
+            list(get_ordered_nodes(graph, cycles.append)),
             ['C', 'B', 'A'])
         self.assertEqual(
             cycles,
@@ -212,14 +231,13 @@ class DepGraphOrderingTests(unittest.TestCase):
 
         cycles = []
         self.assertEqual(
-            list(get_ordered_nodes(graph.reverse())),
+            list(get_ordered_nodes(graph.reverse(copy=False))),
             ['A', 'B', 'C'])
         self.assertEqual(
             cycles,
             [])
 
 
-@unittest.skipIf(nx is None, 'networkx required for depgraph support')
 class DependencyTraversalTests(BaseRepoTestCase):
     def test_a(self):
         pkg = self.get_package('dep/a')
@@ -242,7 +260,6 @@ class DependencyTraversalTests(BaseRepoTestCase):
              ])
 
 
-@unittest.skipIf(nx is None, 'networkx required for depgraph support')
 class DepGraphCreationTests(BaseRepoTestCase):
     def test_simple(self):
         """Test simple deptree"""
@@ -4,9 +4,12 @@
 """ Tests for git support. """
 
 import os
+import shutil
 import subprocess
 import tempfile
+import typing
 import unittest
+import unittest.mock
 
 from pathlib import Path
 
@@ -15,74 +18,101 @@ from nattka.git import (git_get_toplevel, git_is_dirty, git_commit,
                         GitWorkTree, GitCommitNoChanges)
 
 
+# isolate git from user and system configuration, and disable fsync
+# since test repositories are thrown away anyway
+GIT_TEST_ENV = {
+    'GIT_CONFIG_GLOBAL': os.devnull,
+    'GIT_CONFIG_NOSYSTEM': '1',
+    'GIT_CONFIG_COUNT': '1',
+    'GIT_CONFIG_KEY_0': 'core.fsync',
+    'GIT_CONFIG_VALUE_0': 'none',
+}
+
+
+def git(path: typing.Union[Path, str], *args: str) -> None:
+    """Run git with @args in @path, and verify that it succeeded"""
+    subprocess.run(['git', *args], cwd=path, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
 class GitTests(unittest.TestCase):
+    template: tempfile.TemporaryDirectory
+
+    @classmethod
+    def setUpClass(cls):
+        # this applies to git_*() functions as well
+        env_patch = unittest.mock.patch.dict(os.environ, GIT_TEST_ENV)
+        env_patch.start()
+        cls.addClassCleanup(env_patch.stop)
+
+        # initialize the repository once, and copy it for every test
+        cls.template = tempfile.TemporaryDirectory()
+        td = cls.template.name
+        git(td, 'init')
+        git(td, 'config', '--local', 'user.name', 'test')
+        git(td, 'config', '--local', 'user.email', 'test@example.com')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.template.cleanup()
+
     def setUp(self):
         self.tempdir = tempfile.TemporaryDirectory()
 
     def tearDown(self):
         self.tempdir.cleanup()
 
+    def init_repo(self) -> None:
+        """Initialize a git repository in tempdir from the template"""
+        shutil.copytree(Path(self.template.name) / '.git',
+                        Path(self.tempdir.name) / '.git')
+
     def test_git_get_toplevel(self):
         """ Check whether git_get_toplevel() works correctly. """
         td = Path(self.tempdir.name)
 
         # should return None or find some containing repository
-        self.assertNotEqual(git_get_toplevel(Path(self.tempdir.name)),
-                            td)
+        self.assertNotEqual(git_get_toplevel(td), td)
 
-        assert subprocess.Popen(['git', 'init'], cwd=td).wait() == 0
+        self.init_repo()
         self.assertEqual(git_get_toplevel(td), td)
 
         sd = td / 'subdir'
-        os.mkdir(sd)
+        sd.mkdir()
         self.assertEqual(git_get_toplevel(sd), td)
 
     def test_git_is_dirty(self):
         """ Test whether we detect dirty working tree correctly. """
         td = Path(self.tempdir.name)
 
-        assert subprocess.Popen(['git', 'init'], cwd=td).wait() == 0
+        self.init_repo()
         self.assertFalse(git_is_dirty(td))
 
-        with open(td / 'file', 'w') as f:
-            f.write('test\n')
-        assert (subprocess.Popen(['git', 'add', '-N', 'file'], cwd=td)
-                          .wait() == 0)
+        (td / 'file').write_text('test\n')
+        git(td, 'add', '-N', 'file')
         self.assertTrue(git_is_dirty(td))
 
-        assert (subprocess.Popen(['git', 'add', 'file'], cwd=td)
-                          .wait() == 0)
+        git(td, 'add', 'file')
         self.assertFalse(git_is_dirty(td))
 
     def test_git_commit(self):
         """Test whether we commit correctly"""
         td = Path(self.tempdir.name)
-        assert subprocess.Popen(['git', 'init'], cwd=td).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.name', 'test'],
-            cwd=td).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.email', 'test@example.com'],
-            cwd=td).wait() == 0
-
-        with open(td / 'file', 'w') as f:
-            f.write('test\n')
-        assert (subprocess.Popen(['git', 'add', 'file'], cwd=td)
-                          .wait() == 0)
+        self.init_repo()
+
+        (td / 'file').write_text('test\n')
+        git(td, 'add', 'file')
         self.assertNotEqual(git_commit(td, 'test commit', ['file']), '')
 
-        with open(td / 'file', 'w') as f:
-            f.write('other\n')
-        assert (subprocess.Popen(['git', 'add', 'file'], cwd=td)
-                          .wait() == 0)
+        (td / 'file').write_text('other\n')
+        git(td, 'add', 'file')
         self.assertNotEqual(git_commit(td, 'next commit', ['file']), '')
 
-        s = subprocess.Popen(['git', 'log', '--format=%an\n%ae\n%s',
-                              '--name-only', '-2'],
-                             cwd=td,
-                             stdout=subprocess.PIPE)
-        sout, _ = s.communicate()
-        self.assertEqual(sout.decode(),
+        s = subprocess.run(['git', 'log', '--format=%an%n%ae%n%s',
+                            '--name-only', '-2'],
+                           cwd=td, check=True, capture_output=True,
+                           text=True)
+        self.assertEqual(s.stdout,
                          '''test
 test@example.com
 next commit
@@ -97,30 +127,20 @@ file
 
     def test_git_commit_unstaged(self):
         td = Path(self.tempdir.name)
-        assert subprocess.Popen(['git', 'init'], cwd=td).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.name', 'test'],
-            cwd=td).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.email', 'test@example.com'],
-            cwd=td).wait() == 0
-
-        with open(td / 'file', 'w') as f:
-            f.write('test\n')
-        assert (subprocess.Popen(['git', 'add', '-N', 'file'], cwd=td)
-                          .wait() == 0)
+        self.init_repo()
+
+        (td / 'file').write_text('test\n')
+        git(td, 'add', '-N', 'file')
         self.assertNotEqual(git_commit(td, 'test commit', ['file']), '')
 
-        with open(td / 'file', 'w') as f:
-            f.write('other\n')
+        (td / 'file').write_text('other\n')
         self.assertNotEqual(git_commit(td, 'next commit', ['file']), '')
 
-        s = subprocess.Popen(['git', 'log', '--format=%an\n%ae\n%s',
-                              '--name-only', '-2'],
-                             cwd=td,
-                             stdout=subprocess.PIPE)
-        sout, _ = s.communicate()
-        self.assertEqual(sout.decode(),
+        s = subprocess.run(['git', 'log', '--format=%an%n%ae%n%s',
+                            '--name-only', '-2'],
+                           cwd=td, check=True, capture_output=True,
+                           text=True)
+        self.assertEqual(s.stdout,
                          '''test
 test@example.com
 next commit
@@ -136,19 +156,9 @@ file
     def test_git_commit_no_changes(self):
         """Test whether we fail commit on no changes"""
         td = Path(self.tempdir.name)
-        assert subprocess.Popen(['git', 'init'], cwd=td).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.name', 'test'],
-            cwd=td).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.email', 'test@example.com'],
-            cwd=td).wait() == 0
-        with open(td / 'file', 'w') as f:
-            f.write('test\n')
-            f.flush()
-
-        assert (subprocess.Popen(['git', 'add', 'file'], cwd=td)
-                          .wait() == 0)
+        self.init_repo()
+        (td / 'file').write_text('test\n')
+        git(td, 'add', 'file')
         git_commit(td, 'test commit', ['file'])
         self.assertRaises(
             GitCommitNoChanges,
@@ -157,43 +167,31 @@ file
     def test_git_reset_changes(self):
         """ Test whether we reset changes correctly. """
         td = Path(self.tempdir.name)
-        assert subprocess.Popen(['git', 'init'], cwd=td).wait() == 0
-        with open(td / 'file', 'w') as f:
-            f.write('test\n')
-            f.flush()
-            assert (subprocess.Popen(['git', 'add', 'file'], cwd=td)
-                              .wait() == 0)
-            f.write('second\n')
+        self.init_repo()
+        (td / 'file').write_text('test\n')
+        git(td, 'add', 'file')
+        (td / 'file').write_text('test\nsecond\n')
 
         git_reset_changes(td)
-        with open(td / 'file', 'r') as f:
-            self.assertEqual(f.read(), 'test\n')
+        self.assertEqual((td / 'file').read_text(), 'test\n')
 
     def test_context_manager(self):
         td = Path(self.tempdir.name)
-        assert subprocess.Popen(['git', 'init'], cwd=td).wait() == 0
-        with open(td / 'file', 'w') as f:
-            f.write('test\n')
-            f.flush()
-            assert (subprocess.Popen(['git', 'add', 'file'], cwd=td)
-                              .wait() == 0)
+        self.init_repo()
+        (td / 'file').write_text('test\n')
+        git(td, 'add', 'file')
 
-            with GitWorkTree(td):
-                f.write('second\n')
-                f.flush()
+        with GitWorkTree(td):
+            (td / 'file').write_text('test\nsecond\n')
 
-        with open(td / 'file', 'r') as f:
-            self.assertEqual(f.read(), 'test\n')
+        self.assertEqual((td / 'file').read_text(), 'test\n')
 
     def test_context_manager_dirty(self):
         td = Path(self.tempdir.name)
-        assert subprocess.Popen(['git', 'init'], cwd=td).wait() == 0
-        with open(td / 'file', 'w') as f:
-            f.write('test\n')
-            f.flush()
-            assert (subprocess.Popen(['git', 'add', '-N', 'file'], cwd=td)
-                              .wait() == 0)
-
-            with self.assertRaises(GitDirtyWorkTree):
-                with GitWorkTree(td):
-                    pass
+        self.init_repo()
+        (td / 'file').write_text('test\n')
+        git(td, 'add', '-N', 'file')
+
+        with self.assertRaises(GitDirtyWorkTree):
+            with GitWorkTree(td):
+                pass
@@ -4,7 +4,10 @@
 """ Integration tests. """
 
 import datetime
+import errno
+import functools
 import io
+import os
 import shutil
 import subprocess
 import tempfile
@@ -15,13 +18,13 @@ from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pkgcore.ebuild.ebuild_src
+import pkgcore.restrictions.restriction
 from pkgcore.ebuild.repository import UnconfiguredTree
 from pkgcore.util import parserestrict
 
 from nattka.bugzilla import BugCategory, BugInfo
 from nattka.__main__ import main, have_nattka_depgraph
-
-from test.test_package import get_test_repo
+from nattka.package import find_repository
 
 
 FULL_CC = ['alpha@gentoo.org', 'amd64-linux@gentoo.org',
@@ -29,6 +32,27 @@ FULL_CC = ['alpha@gentoo.org', 'amd64-linux@gentoo.org',
            'sparc-freebsd@gentoo.org', 'x86-macos@gentoo.org']
 
 
+def link_or_copy(src: str, dst: str) -> None:
+    """
+    Hardlink @src to @dst, falling back to copying across filesystems
+
+    Files are never modified in place by nattka (it uses atomic writes)
+    nor by git, so it is safe to share them between test repositories.
+    """
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.copy2(src, dst)
+
+
+@functools.cache
+def parse_match(atom: str) -> pkgcore.restrictions.restriction.base:
+    """Parse @atom into a restriction, reusing earlier results"""
+    return parserestrict.parse_match(atom)
+
+
 class FakeDateTime:
     def __init__(self, dt):
         self._dt = dt
@@ -43,64 +67,94 @@ class IntegrationTestCase(unittest.TestCase):
     with a temporary clone of the repository.
     """
 
-    tempdir: tempfile.TemporaryDirectory
+    # prepared by setUpModule()
+    template: tempfile.TemporaryDirectory
+
+    tempdir_path: Path
     repo: UnconfiguredTree
     common_args: typing.List[str]
 
+    # we do not need an API key since we mock NattkaBugzilla
+    # but the program refuses to run without it
+    base_args = ('--api-key', 'UNUSED')
+
     def setUp(self):
-        self.tempdir = tempfile.TemporaryDirectory()
-        tempdir_path = Path(self.tempdir.name)
+        self.tempdir_path = tempdir_path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tempdir_path, True)
         self.cache_file = str(tempdir_path / 'cache.json')
-        basedir = Path(__file__).parent
-        for subdir in ('conf', 'data'):
-            shutil.copytree(basedir / subdir,
-                            tempdir_path / subdir,
-                            symlinks=True)
+        # conf is not modified by the tests, so it is used directly
+        # from the template
+        conf_path = Path(self.template.name) / 'conf'
+        shutil.copytree(Path(self.template.name) / 'data',
+                        tempdir_path / 'data',
+                        symlinks=True, copy_function=link_or_copy)
 
-        self.repo = get_test_repo(tempdir_path).repo
+        self.repo = find_repository(tempdir_path / 'data', conf_path).repo
 
         self.common_args = [
-            # we do not need an API key since we mock NattkaBugzilla
-            # but the program refuses to run without it
-            '--api-key', 'UNUSED',
-            '--portage-conf', str(tempdir_path / 'conf'),
+            *self.base_args,
+            '--portage-conf', str(conf_path),
             '--repo', self.repo.location,
         ]
 
-        assert subprocess.Popen(['git', 'init'],
-                                cwd=self.repo.location).wait() == 0
-        assert subprocess.Popen(['git', 'add', '-A'],
-                                cwd=self.repo.location).wait() == 0
-
-    def tearDown(self):
-        self.tempdir.cleanup()
-
     def get_package(self,
                     atom: str
                     ) -> pkgcore.ebuild.ebuild_src.package:
-        pkg = self.repo.match(parserestrict.parse_match(atom))
+        pkg = self.repo.match(parse_match(atom))
         assert len(pkg) == 1
         return pkg[0]
 
 
+def setUpModule():
+    # prepare the repository and git index once, and copy them
+    # for every test
+    template = tempfile.TemporaryDirectory()
+    IntegrationTestCase.template = template
+    template_path = Path(template.name)
+    basedir = Path(__file__).parent
+    for subdir in ('conf', 'data'):
+        shutil.copytree(basedir / subdir,
+                        template_path / subdir,
+                        symlinks=True)
+
+    # the copies get new inodes and ctimes, so make git compare
+    # only mtime and size (which copytree() preserves); also
+    # disable fsync, as the repositories are thrown away anyway
+    subprocess.run(['sh', '-c',
+                    'git init -q && '
+                    'git config --local core.trustctime false && '
+                    'git config --local core.checkStat minimal && '
+                    'git config --local core.fsync none && '
+                    'git config --local user.name test && '
+                    'git config --local user.email test@example.com && '
+                    'git add -A'],
+                   cwd=template_path / 'data', check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def tearDownModule():
+    IntegrationTestCase.template.cleanup()
+
+
 class IntegrationNoActionTests(IntegrationTestCase):
     """Test cases for bugs that can not be processed"""
 
     reset_msg = ('Resetting sanity check; package list is empty '
                  'or all packages are done.')
 
+    bug_template = BugInfo(BugCategory.STABLEREQ,
+                           '   \r\n'
+                           '\r\n',
+                           last_change_time=datetime.datetime(
+                               2020, 1, 1, 12, 0, 0))
+
     def bug_preset(self,
                    bugz: MagicMock,
                    initial_status: typing.Optional[bool] = None
                    ) -> MagicMock:
         bugz_inst = bugz.return_value
         bugz_inst.find_bugs.return_value = {
-            560322: BugInfo(BugCategory.STABLEREQ,
-                            '   \r\n'
-                            '\r\n',
-                            sanity_check=initial_status,
-                            last_change_time=datetime.datetime(
-                                2020, 1, 1, 12, 0, 0)),
+            560322: self.bug_template._replace(sanity_check=initial_status),
         }
         bugz_inst.resolve_dependencies.return_value = (
             bugz_inst.find_bugs.return_value)
@@ -208,7 +262,7 @@ class IntegrationNoActionTests(IntegrationTestCase):
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/mixed-keywords-3\r\n'
                             'test/amd64-testing-1 amd64\r\n',
-                            keywords=['CC-ARCHES'],
+                            keywords=('CC-ARCHES',),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -309,6 +363,10 @@ class IntegrationNoActionTests(IntegrationTestCase):
 class IntegrationSuccessTests(IntegrationTestCase):
     """Integration tests that pass sanity-check"""
 
+    bug_template = BugInfo(BugCategory.STABLEREQ,
+                           'test/amd64-testing-1 amd64\r\n'
+                           'test/alpha-amd64-hppa-testing-2 amd64 hppa\r\n')
+
     def bug_preset(self,
                    bugz: MagicMock,
                    initial_status: typing.Optional[bool] = None,
@@ -318,12 +376,10 @@ class IntegrationSuccessTests(IntegrationTestCase):
                    ) -> MagicMock:
         bugz_inst = bugz.return_value
         bugz_inst.find_bugs.return_value = {
-            560322: BugInfo(BugCategory.STABLEREQ,
-                            'test/amd64-testing-1 amd64\r\n'
-                            'test/alpha-amd64-hppa-testing-2 amd64 hppa\r\n',
-                            sanity_check=initial_status,
-                            last_change_time=last_change_time,
-                            **kwargs),
+            560322: self.bug_template._replace(
+                sanity_check=initial_status,
+                last_change_time=last_change_time,
+                **kwargs),
         }
         bugz_inst.resolve_dependencies.return_value = (
             bugz_inst.find_bugs.return_value)
@@ -472,7 +528,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 hppa\r\n'
                             'test/alpha-amd64-hppa-testing-2 hppa\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org'],
+                            ('amd64@gentoo.org', 'hppa@gentoo.org'),
                             sanity_check=True),
         }
         bugz_inst.resolve_dependencies.return_value = (
@@ -538,12 +594,12 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311], sanity_check=True),
+                            depends=(560311,), sanity_check=True),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322], sanity_check=True),
+                            blocks=(560322,), sanity_check=True),
         }
         bugz_inst.resolve_dependencies.return_value.update(
             bugz_inst.find_bugs.return_value)
@@ -570,12 +626,12 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311], sanity_check=True),
+                            depends=(560311,), sanity_check=True),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322], resolved=True),
+                            blocks=(560322,), resolved=True),
         }
         bugz_inst.resolve_dependencies.return_value.update(
             bugz_inst.find_bugs.return_value)
@@ -606,12 +662,12 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha ~hppa\r\n',
-                            depends=[560311], sanity_check=True),
+                            depends=(560311,), sanity_check=True),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             '',
-                            blocks=[560322]),
+                            blocks=(560322,)),
         }
         bugz_inst.resolve_dependencies.return_value.update(
             bugz_inst.find_bugs.return_value)
@@ -640,12 +696,12 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha ~hppa\r\n',
-                            depends=[560311], sanity_check=True),
+                            depends=(560311,), sanity_check=True),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322]),
+                            blocks=(560322,)),
         }
         bugz_inst.resolve_dependencies.return_value.update(
             bugz_inst.find_bugs.return_value)
@@ -677,12 +733,12 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311], sanity_check=True),
+                            depends=(560311,), sanity_check=True),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322], sanity_check=True),
+                            blocks=(560322,), sanity_check=True),
         }
         bugz_inst.resolve_dependencies.return_value.update(
             bugz_inst.find_bugs.return_value)
@@ -743,7 +799,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
                             'test/mixed-keywords-3 amd64 hppa\r\n'
                             'test/mixed-keywords-4 amd64 hppa\r\n',
                             sanity_check=True,
-                            keywords=['ALLARCHES']),
+                            keywords=('ALLARCHES',)),
         }
         bugz_inst.resolve_dependencies.return_value = (
             bugz_inst.find_bugs.return_value)
@@ -776,7 +832,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
                             'test/mixed-keywords-3 amd64 hppa\r\n'
                             'test/mixed-keywords-4 amd64 hppa\r\n',
                             sanity_check=True,
-                            keywords=['ALLARCHES']),
+                            keywords=('ALLARCHES',)),
         }
         bugz_inst.resolve_dependencies.return_value = (
             bugz_inst.find_bugs.return_value)
@@ -930,7 +986,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1\r\n',
-                            ['alpha@gentoo.org', 'hppa@gentoo.org'],
+                            ('alpha@gentoo.org', 'hppa@gentoo.org'),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -961,7 +1017,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1\r\n',
-                            ['alpha@gentoo.org'],
+                            ('alpha@gentoo.org',),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -980,7 +1036,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1\r\n',
-                            ['alpha@gentoo.org', 'hppa@gentoo.org'],
+                            ('alpha@gentoo.org', 'hppa@gentoo.org'),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -1002,7 +1058,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -1010,7 +1066,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1041,7 +1097,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -1049,7 +1105,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1089,7 +1145,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -1097,7 +1153,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1116,7 +1172,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.resolve_dependencies.return_value.update({
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha ~hppa\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         })
@@ -1183,12 +1239,12 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1215,14 +1271,14 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 ~alpha\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1249,14 +1305,14 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/mixed-keywords-4 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1283,7 +1339,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1346,7 +1402,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
             560311: BugInfo(BugCategory.STABLEREQ,
                             'test/amd64-testing-1 amd64 hppa\r\n'
                             'test/amd64-testing-2 amd64\r\n',
-                            cc=['hppa@gentoo.org'],
+                            cc=('hppa@gentoo.org',),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1423,7 +1479,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 amd64 hppa amd64-linux '
                             'x86-macos sparc-freebsd\r\n',
-                            keywords=['CC-ARCHES'],
+                            keywords=('CC-ARCHES',),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1486,7 +1542,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/amd64-testing-1 amd64\r\n',
-                            keywords=['ALLARCHES'],
+                            keywords=('ALLARCHES',),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1528,7 +1584,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/amd64-testing-1 amd64\r\n',
-                            keywords=['ALLARCHES'],
+                            keywords=('ALLARCHES',),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -1550,7 +1606,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/mixed-keywords-3 *\r\n'
                             'test/amd64-testing-2 ^\r\n',
-                            ['amd64@gentoo.org'],
+                            ('amd64@gentoo.org',),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1574,7 +1630,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/mixed-keywords-3 *\r\n'
                             'test/amd64-testing-2 ^\r\n',
-                            keywords=['CC-ARCHES'],
+                            keywords=('CC-ARCHES',),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1618,7 +1674,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/mixed-keywords-3 *\r\n'
                             'test/amd64-testing-2 ^\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org'],
+                            ('amd64@gentoo.org', 'hppa@gentoo.org'),
                             sanity_check=True,
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
@@ -1644,7 +1700,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/mixed-keywords-3\r\n'
                             'test/amd64-testing-2 ^ hppa\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org'],
+                            ('amd64@gentoo.org', 'hppa@gentoo.org'),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1664,7 +1720,7 @@ class IntegrationSuccessTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/mixed-keywords-3\r\n',
-                            keywords=['CC-ARCHES'],
+                            keywords=('CC-ARCHES',),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -1727,13 +1783,6 @@ class IntegrationSuccessTests(IntegrationTestCase):
 
     @patch('nattka.__main__.NattkaBugzilla')
     def test_commit(self, bugz):
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.name', 'test'],
-            cwd=self.repo.location).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.email', 'test@example.com'],
-            cwd=self.repo.location).wait() == 0
-
         bugz_inst = self.bug_preset(bugz, initial_status=True)
         self.assertEqual(
             main(self.common_args + ['apply', '-a', '*', '560322']),
@@ -1743,12 +1792,11 @@ class IntegrationSuccessTests(IntegrationTestCase):
             0)
         bugz_inst.find_bugs.assert_called_with(bugs=[560322])
 
-        s = subprocess.Popen(['git', 'log', '--format=%an\n%ae\n%B',
-                              '--name-only'],
-                             cwd=self.repo.location,
-                             stdout=subprocess.PIPE)
-        sout, _ = s.communicate()
-        self.assertEqual(sout.decode(),
+        s = subprocess.run(['git', 'log', '--format=%an%n%ae%n%B',
+                            '--name-only'],
+                           cwd=self.repo.location, check=True,
+                           capture_output=True, text=True)
+        self.assertEqual(s.stdout,
                          '''test
 test@example.com
 test/alpha-amd64-hppa-testing: Stabilize 2 amd64 hppa, #560322
@@ -1771,13 +1819,6 @@ test/amd64-testing/amd64-testing-1.ebuild
                      'networkx required for dep sorting')
     @patch('nattka.__main__.NattkaBugzilla')
     def test_commit_dep_sorting(self, bugz):
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.name', 'test'],
-            cwd=self.repo.location).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.email', 'test@example.com'],
-            cwd=self.repo.location).wait() == 0
-
         bugz_inst = bugz.return_value
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
@@ -1795,12 +1836,11 @@ test/amd64-testing/amd64-testing-1.ebuild
             0)
         bugz_inst.find_bugs.assert_called_with(bugs=[560322])
 
-        s = subprocess.Popen(['git', 'log', '--format=%an\n%ae\n%B',
-                              '--name-only'],
-                             cwd=self.repo.location,
-                             stdout=subprocess.PIPE)
-        sout, _ = s.communicate()
-        self.assertEqual(sout.decode(),
+        s = subprocess.run(['git', 'log', '--format=%an%n%ae%n%B',
+                            '--name-only'],
+                           cwd=self.repo.location, check=True,
+                           capture_output=True, text=True)
+        self.assertEqual(s.stdout,
                          '''test
 test@example.com
 test/amd64-testing-deps: Stabilize 1 amd64, #560322
@@ -1821,20 +1861,13 @@ test/amd64-testing/amd64-testing-1.ebuild
 
     @patch('nattka.__main__.NattkaBugzilla')
     def test_commit_allarches(self, bugz):
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.name', 'test'],
-            cwd=self.repo.location).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.email', 'test@example.com'],
-            cwd=self.repo.location).wait() == 0
-
         bugz_inst = bugz.return_value
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/mixed-keywords-3 amd64 hppa\r\n'
                             'test/mixed-keywords-4 amd64 hppa\r\n',
                             sanity_check=True,
-                            keywords=['ALLARCHES']),
+                            keywords=('ALLARCHES',)),
         }
         bugz_inst.resolve_dependencies.return_value = (
             bugz_inst.find_bugs.return_value)
@@ -1846,12 +1879,11 @@ test/amd64-testing/amd64-testing-1.ebuild
             0)
         bugz_inst.find_bugs.assert_called_with(bugs=[560322])
 
-        s = subprocess.Popen(['git', 'log', '--format=%an\n%ae\n%B',
-                              '--name-only'],
-                             cwd=self.repo.location,
-                             stdout=subprocess.PIPE)
-        sout, _ = s.communicate()
-        self.assertEqual(sout.decode(),
+        s = subprocess.run(['git', 'log', '--format=%an%n%ae%n%B',
+                            '--name-only'],
+                           cwd=self.repo.location, check=True,
+                           capture_output=True, text=True)
+        self.assertEqual(s.stdout,
                          '''test
 test@example.com
 test/mixed-keywords: Stabilize 4 ALLARCHES, #560322
@@ -1872,20 +1904,13 @@ test/mixed-keywords/mixed-keywords-3.ebuild
 
     @patch('nattka.__main__.NattkaBugzilla')
     def test_commit_allarches_ignore(self, bugz):
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.name', 'test'],
-            cwd=self.repo.location).wait() == 0
-        assert subprocess.Popen(
-            ['git', 'config', '--local', 'user.email', 'test@example.com'],
-            cwd=self.repo.location).wait() == 0
-
         bugz_inst = bugz.return_value
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/mixed-keywords-3 amd64 hppa\r\n'
                             'test/mixed-keywords-4 amd64 hppa\r\n',
                             sanity_check=True,
-                            keywords=['ALLARCHES']),
+                            keywords=('ALLARCHES',)),
         }
         bugz_inst.resolve_dependencies.return_value = (
             bugz_inst.find_bugs.return_value)
@@ -1899,12 +1924,11 @@ test/mixed-keywords/mixed-keywords-3.ebuild
             0)
         bugz_inst.find_bugs.assert_called_with(bugs=[560322])
 
-        s = subprocess.Popen(['git', 'log', '--format=%an\n%ae\n%B',
-                              '--name-only'],
-                             cwd=self.repo.location,
-                             stdout=subprocess.PIPE)
-        sout, _ = s.communicate()
-        self.assertEqual(sout.decode(),
+        s = subprocess.run(['git', 'log', '--format=%an%n%ae%n%B',
+                            '--name-only'],
+                           cwd=self.repo.location, check=True,
+                           capture_output=True, text=True)
+        self.assertEqual(s.stdout,
                          '''test
 test@example.com
 test/mixed-keywords: Stabilize 4 amd64, #560322
@@ -1932,6 +1956,11 @@ class IntegrationFailureTests(IntegrationTestCase):
                 '>   rdepend ~alpha stable profile alpha (1 total)\n'
                 '>     test/amd64-testing')
 
+    bug_template = BugInfo(BugCategory.KEYWORDREQ,
+                           'test/amd64-testing-deps-1 ~alpha\r\n',
+                           last_change_time=datetime.datetime(
+                               2020, 1, 1, 12, 0, 0))
+
     def bug_preset(self,
                    bugz: MagicMock,
                    initial_status: typing.Optional[bool] = None,
@@ -1939,12 +1968,8 @@ class IntegrationFailureTests(IntegrationTestCase):
                    ) -> MagicMock:
         bugz_inst = bugz.return_value
         bugz_inst.find_bugs.return_value = {
-            560322: BugInfo(BugCategory.KEYWORDREQ,
-                            'test/amd64-testing-deps-1 ~alpha\r\n',
-                            sanity_check=initial_status,
-                            last_change_time=datetime.datetime(
-                                2020, 1, 1, 12, 0, 0),
-                            **kwargs),
+            560322: self.bug_template._replace(sanity_check=initial_status,
+                                               **kwargs),
         }
         bugz_inst.resolve_dependencies.return_value = (
             bugz_inst.find_bugs.return_value)
@@ -1992,6 +2017,19 @@ class IntegrationFailureTests(IntegrationTestCase):
             560322, False, self.fail_msg)
         self.post_verify()
 
+    @patch('nattka.__main__.NattkaBugzilla')
+    def test_sanity_from_fail_no_comment_failed(self, bugz):
+        bugz_inst = self.bug_preset(bugz, initial_status=False)
+        bugz_inst.get_latest_comment.return_value = None
+        self.assertEqual(
+            main(self.common_args + ['sanity-check', '--update-bugs',
+                                     '560322']),
+            0)
+        bugz_inst.find_bugs.assert_called_with(bugs=[560322])
+        bugz_inst.update_status.assert_called_with(
+            560322, False, self.fail_msg)
+        self.post_verify()
+
     @patch('nattka.__main__.NattkaBugzilla')
     def test_sanity_from_fail_other(self, bugz):
         bugz_inst = self.bug_preset(bugz, initial_status=False)
@@ -2243,14 +2281,14 @@ class IntegrationFailureTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/enoent-7 ~alpha\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -2276,14 +2314,14 @@ class IntegrationFailureTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/enoent-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/enoent-7 ~alpha\r\n',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -2308,14 +2346,14 @@ class IntegrationFailureTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-deps-1 ~alpha\r\n',
-                            depends=[560311],
+                            depends=(560311,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
         bugz_inst.resolve_dependencies.return_value = {
             560311: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1',
-                            blocks=[560322],
+                            blocks=(560322,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -2362,12 +2400,12 @@ class IntegrationFailureTests(IntegrationTestCase):
             # security bugs
             560332: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 alpha ~hppa\r\n',
-                            keywords=['SECURITY'],
+                            keywords=('SECURITY',),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
             560334: BugInfo(BugCategory.STABLEREQ,
                             'test/amd64-testing-1 amd64\r\n',
-                            keywords=['SECURITY'],
+                            keywords=('SECURITY',),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
             560336: BugInfo(BugCategory.STABLEREQ,
@@ -2405,7 +2443,7 @@ class IntegrationFailureTests(IntegrationTestCase):
             # respective stablereq
             560334: BugInfo(BugCategory.STABLEREQ,
                             'test/amd64-testing-1 amd64\r\n',
-                            blocks=[560324],
+                            blocks=(560324,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -2436,7 +2474,7 @@ class IntegrationFailureTests(IntegrationTestCase):
             # respective stablereq
             560334: BugInfo(BugCategory.KEYWORDREQ,
                             'test/amd64-testing-1 alpha ~hppa\r\n',
-                            blocks=[560324],
+                            blocks=(560324,),
                             last_change_time=datetime.datetime(
                                 2020, 1, 1, 12, 0, 0)),
         }
@@ -2460,15 +2498,15 @@ class IntegrationLimiterTests(IntegrationTestCase):
     Tests for limiting the number of processed bugs.
     """
 
+    bug_template = BugInfo(BugCategory.STABLEREQ,
+                           'test/amd64-testing-1 amd64\r\n',
+                           last_change_time=datetime.datetime(
+                               2020, 1, 1, 12, 0, 0))
+
     def bug_preset(self,
                    bugz: MagicMock
                    ) -> MagicMock:
-        bugs = {}
-        for i in range(10):
-            bugs[100000 + i] = BugInfo(BugCategory.STABLEREQ,
-                                       'test/amd64-testing-1 amd64\r\n',
-                                       last_change_time=datetime.datetime(
-                                           2020, 1, 1, 12, 0, 0))
+        bugs = {100000 + i: self.bug_template for i in range(10)}
 
         bugz_inst = bugz.return_value
         bugz_inst.find_bugs.return_value = bugs
@@ -2557,7 +2595,7 @@ class ResolveTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/example-1\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org']),
+                            ('amd64@gentoo.org', 'hppa@gentoo.org')),
         }
         self.assertEqual(
             main(self.common_args + ['resolve', '-a', 'hppa', '560322']),
@@ -2573,7 +2611,7 @@ class ResolveTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/example-1\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org']),
+                            ('amd64@gentoo.org', 'hppa@gentoo.org')),
         }
         self.assertEqual(
             main(self.common_args + ['resolve', '-a', '*', '560322']),
@@ -2592,7 +2630,7 @@ class ResolveTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/example-1\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org'],
+                            ('amd64@gentoo.org', 'hppa@gentoo.org'),
                             security=True),
         }
         self.assertEqual(
@@ -2612,7 +2650,7 @@ class ResolveTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/example-1\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org'],
+                            ('amd64@gentoo.org', 'hppa@gentoo.org'),
                             resolved=True),
         }
         self.assertEqual(
@@ -2632,7 +2670,7 @@ class ResolveTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/example-1\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org']),
+                            ('amd64@gentoo.org', 'hppa@gentoo.org')),
         }
         self.assertEqual(
             main(self.common_args + ['resolve', '-a', '*', '560322',
@@ -2652,7 +2690,7 @@ class ResolveTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/example-1\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org']),
+                            ('amd64@gentoo.org', 'hppa@gentoo.org')),
         }
         self.assertEqual(
             main(self.common_args + ['resolve', '-a', '*', '560322',
@@ -2667,8 +2705,8 @@ class ResolveTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/example-1\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org'],
-                            keywords=['ALLARCHES']),
+                            ('amd64@gentoo.org', 'hppa@gentoo.org'),
+                            keywords=('ALLARCHES',)),
         }
         self.assertEqual(
             main(self.common_args + ['resolve', '-a', 'hppa', '560322']),
@@ -2684,8 +2722,8 @@ class ResolveTests(IntegrationTestCase):
         bugz_inst.find_bugs.return_value = {
             560322: BugInfo(BugCategory.STABLEREQ,
                             'test/example-1\r\n',
-                            ['amd64@gentoo.org', 'hppa@gentoo.org'],
-                            keywords=['ALLARCHES']),
+                            ('amd64@gentoo.org', 'hppa@gentoo.org'),
+                            keywords=('ALLARCHES',)),
         }
         self.assertEqual(
             main(self.common_args + ['resolve', '-a', 'hppa', '560322',
@@ -6,13 +6,16 @@
 import os
 import shutil
 import tempfile
+import typing
 import unittest
 
 from pathlib import Path
 
 import lxml.etree
 
+import pkgcore.ebuild.ebuild_src
 from pkgcore.ebuild.atom import atom
+from pkgcore.ebuild.repository import UnconfiguredTree
 
 from nattka.bugzilla import BugCategory, BugInfo
 from nattka.keyword import KEYWORDS_RE
@@ -141,13 +144,21 @@ class FindRepositoryConfiguredSymlinkTests(
 
 
 class BaseRepoTestCase(unittest.TestCase):
-    def setUp(self):
-        self.repo = get_test_repo().repo
+    repo: UnconfiguredTree
+    packages: typing.Dict[str, pkgcore.ebuild.ebuild_src.package]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.repo = get_test_repo().repo
+        cls.packages = {}
 
     def get_package(self, spec):
-        pkg = self.repo.match(atom(spec))
-        assert len(pkg) == 1
-        return pkg[0]
+        pkg = self.packages.get(spec)
+        if pkg is None:
+            match = self.repo.match(atom(spec))
+            assert len(match) == 1
+            pkg = self.packages[spec] = match[0]
+        return pkg
 
     def ebuild_path(self, cat, pkg, ver):
         return str(Path(self.repo.location) / cat / pkg
@@ -609,8 +620,8 @@ class PackageMatcherTests(BaseRepoTestCase):
             list(((p.path, k) for p, k in match_package_list(
                 self.repo, BugInfo(BugCategory.STABLEREQ, '''
                     test/mixed-keywords-4
-                ''', ['amd64@gentoo.org', 'hppa@gentoo.org',
-                      'example@gentoo.org'])))), [
+                ''', ('amd64@gentoo.org', 'hppa@gentoo.org',
+                      'example@gentoo.org'))))), [
                 (self.ebuild_path('test', 'mixed-keywords', '4'),
                  ['amd64', 'hppa']),
             ])
@@ -621,7 +632,7 @@ class PackageMatcherTests(BaseRepoTestCase):
             list(((p.path, k) for p, k in match_package_list(
                 self.repo, BugInfo(BugCategory.STABLEREQ, '''
                     test/mixed-keywords-4 amd64 hppa
-                ''', ['amd64@gentoo.org'])))), [
+                ''', ('amd64@gentoo.org',))))), [
                 (self.ebuild_path('test', 'mixed-keywords', '4'),
                  ['amd64']),
             ])
@@ -633,7 +644,7 @@ class PackageMatcherTests(BaseRepoTestCase):
                 self.repo, BugInfo(BugCategory.STABLEREQ, '''
                     test/mixed-keywords-4 amd64 hppa
                     test/amd64-testing-1 hppa
-                ''', ['amd64@gentoo.org'])))), [
+                ''', ('amd64@gentoo.org',))))), [
                 (self.ebuild_path('test', 'mixed-keywords', '4'),
                  ['amd64']),
             ])
@@ -648,7 +659,7 @@ class PackageMatcherTests(BaseRepoTestCase):
             list(((p.path, k) for p, k in match_package_list(
                 self.repo, BugInfo(BugCategory.STABLEREQ, '''
                     test/mixed-keywords-4
-                ''', ['amd64', 'hppa', 'example'])))), [
+                ''', ('amd64', 'hppa', 'example'))))), [
                 (self.ebuild_path('test', 'mixed-keywords', '4'),
                  ['amd64', 'hppa']),
             ])
@@ -718,7 +729,7 @@ class PackageMatcherTests(BaseRepoTestCase):
             for m in match_package_list(
                     self.repo, BugInfo(BugCategory.STABLEREQ, '''
                         test/amd64-testing-1 amd64
-                    ''', ['hppa@gentoo.org'])):
+                    ''', ('hppa@gentoo.org',))):
                 pass
 
     def test_filter_arch(self):
@@ -773,7 +784,7 @@ test/amd64-testing-2 amd64  # also inline comment
                 self.repo,
                 BugInfo(BugCategory.STABLEREQ, '''
                     test/mixed-keywords-3 amd64 hppa
-                ''', keywords=['ALLARCHES']),
+                ''', keywords=('ALLARCHES',)),
                 permit_allarches=True,
                 filter_arch=['amd64']))), [
                 (self.ebuild_path('test', 'mixed-keywords', '3'),
@@ -786,7 +797,7 @@ test/amd64-testing-2 amd64  # also inline comment
                 self.repo,
                 BugInfo(BugCategory.STABLEREQ, '''
                     test/mixed-keywords-4 amd64 hppa
-                ''', keywords=['ALLARCHES']),
+                ''', keywords=('ALLARCHES',)),
                 permit_allarches=True,
                 filter_arch=['amd64']))), [
                 (self.ebuild_path('test', 'mixed-keywords', '4'),
@@ -799,7 +810,7 @@ test/amd64-testing-2 amd64  # also inline comment
                 self.repo,
                 BugInfo(BugCategory.STABLEREQ, '''
                     test/mixed-keywords-4 amd64 hppa
-                ''', keywords=['ALLARCHES']),
+                ''', keywords=('ALLARCHES',)),
                 permit_allarches=True,
                 filter_arch=['hppa']))), [
                 (self.ebuild_path('test', 'mixed-keywords', '4'),